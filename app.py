@@ -1,53 +1,88 @@
 from flask import Flask, redirect, url_for, render_template, session
-from routes.user_routes import user_bp
-from routes.event_request_routes import event_request_bp
-from routes.request_status_routes import request_status_bp
-from routes.event_registrations_routes import event_registrations_bp
-from routes.event_request_management_routes import event_request_management_bp
-from routes.osas_event_management_routes import osas_event_management_bp
-from routes.department_event_management_routes import department_event_management_bp
+import importlib
 import os
 
-app = Flask(__name__)
+# (module, blueprint) pairs, imported only when an app is created
+BLUEPRINTS = [
+    ("routes.user_routes", "user_bp"),
+    ("routes.event_request_routes", "event_request_bp"),
+    ("routes.request_status_routes", "request_status_bp"),
+    ("routes.event_registrations_routes", "event_registrations_bp"),
+    ("routes.event_request_management_routes", "event_request_management_bp"),
+    ("routes.osas_event_management_routes", "osas_event_management_bp"),
+    ("routes.department_event_management_routes", "department_event_management_bp"),
+    ("routes.check_in_routes", "check_in_bp"),
+    ("routes.job_queue_routes", "job_queue_bp"),
+]
 
-# Use environment variable for secret key in production
-app.secret_key = os.getenv('SECRET_KEY', 'your_secret_key_fallback_for_local_dev')
 
-# Register blueprints
-app.register_blueprint(user_bp)
-app.register_blueprint(event_request_bp)
-app.register_blueprint(request_status_bp)
-app.register_blueprint(event_registrations_bp)
-app.register_blueprint(event_request_management_bp)
-app.register_blueprint(osas_event_management_bp)
-app.register_blueprint(department_event_management_bp)
-
-
-@app.route("/")
 def home():
     return redirect(url_for("user.login"))
 
-@app.route("/student/dashboard")
 def student_dashboard():
     if "user_email" not in session:
         return redirect(url_for("user.login"))
     return "Student Dashboard"
 
-@app.route("/department/dashboard")
 def department_dashboard():
     if "user_email" not in session:
         return redirect(url_for("user.login"))
     return render_template("base_department.html")
 
-@app.route("/osas/dashboard")
 def osas_dashboard():
     if "user_email" not in session:
         return redirect(url_for("user.login"))
     return render_template("base_osas.html")
 
+
+def create_app(blueprints=None):
+    """
+    Build the Flask app
+    `blueprints` limits which blueprint modules are imported (default: all)
+    The data client is not created here; each process creates its own on first use
+    """
+    from utils.assets import init_assets
+    from utils.metrics import init_metrics
+
+    app = Flask(__name__)
+
+    # Use environment variable for secret key in production
+    app.secret_key = os.getenv('SECRET_KEY', 'your_secret_key_fallback_for_local_dev')
+
+    # Register blueprints
+    for module_name, blueprint_name in BLUEPRINTS:
+        if blueprints is not None and blueprint_name not in blueprints:
+            continue
+        app.register_blueprint(getattr(importlib.import_module(module_name), blueprint_name))
+
+    # Hashed static files under /assets and the static_url() template helper
+    init_assets(app)
+
+    # Per-request data-store accounting and the /metrics endpoint
+    init_metrics(app)
+
+    app.add_url_rule("/", "home", home)
+    app.add_url_rule("/student/dashboard", "student_dashboard", student_dashboard)
+    app.add_url_rule("/department/dashboard", "department_dashboard", department_dashboard)
+    app.add_url_rule("/osas/dashboard", "osas_dashboard", osas_dashboard)
+
+    return app
+
+
+def __getattr__(name):
+    # Keeps `gunicorn app:app` and `from app import app` working without
+    # building the app at import time
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(name)
+
+
 if __name__ == "__main__":
+    app = create_app()
     # Get port from environment variable (Render sets this)
     port = int(os.getenv('PORT', 5000))
     # Debug mode off in production
     debug_mode = os.getenv('FLASK_ENV') == 'development'
-    app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=debug_mode, host='0.0.0.0', port=port)
@@ -0,0 +1,61 @@
+"""
+The data-access interface the models are written against.
+
+It is the subset of the supabase-py client the models use:
+
+    client.table(name)
+        .select(columns, count=None, head=None) | .insert(rows) | .update(values)
+        | .upsert(rows) | .delete()
+        .eq / .neq / .gt / .gte / .lt / .lte / .in_ / .is_ / .or_
+        .order(column, desc=False) / .limit(n) / .range(start, end)
+        .execute() -> response with .data (list of dicts) and .count
+
+    client.rpc(function, params).execute()
+        -> response with .data: the rows a database function returned
+        (functions are defined in migrations/)
+
+    client.auth.sign_in_with_password({"email": ..., "password": ...})
+    client.auth.sign_out()
+
+`columns` may embed a related row the way PostgREST does, e.g.
+"*, users!events_department_id_fkey(full_name, email)", which adds a
+"users" dict to every row.
+
+The Supabase client satisfies this interface as-is; local implementations
+subclass DataClient.
+"""
+import abc
+
+# Tables the models read and write
+TABLES = ("users", "event_requests", "events", "registrations", "token_revocations")
+
+# Foreign keys the models embed: constraint name -> (table, column, referenced table)
+FOREIGN_KEYS = {
+    "events_department_id_fkey": ("events", "department_id", "users"),
+    "event_requests_department_id_fkey": ("event_requests", "department_id", "users"),
+    "registrations_student_id_fkey": ("registrations", "student_id", "users"),
+    "registrations_event_id_fkey": ("registrations", "event_id", "events"),
+    "events_event_request_id_fkey": ("events", "event_request_id", "event_requests"),
+}
+
+
+class QueryResponse:
+    """Result of execute(): matching rows plus the optional exact count"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class DataClient(abc.ABC):
+    """Base class for local data backends"""
+
+    auth = None
+
+    @abc.abstractmethod
+    def table(self, name):
+        """Query builder for one table"""
+
+    @abc.abstractmethod
+    def rpc(self, function, params):
+        """Call of a database function; execute() runs it"""
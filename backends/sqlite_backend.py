@@ -0,0 +1,533 @@
+"""
+In-process SQLite implementation of the data-access interface in backends/base.py.
+
+Used for local development, load tests and benchmarks without a Supabase
+project. Select it with DATA_BACKEND=sqlite (SQLITE_PATH defaults to an
+in-memory database).
+"""
+from backends.base import DataClient, QueryResponse, FOREIGN_KEYS, TABLES
+from datetime import datetime, timezone
+import json
+import re
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name TEXT,
+    student_id TEXT,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT,
+    role TEXT NOT NULL DEFAULT 'student',
+    department_name TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS event_requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    department_id INTEGER NOT NULL REFERENCES users(id),
+    event_name TEXT NOT NULL,
+    description TEXT,
+    location TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    participant_limit INTEGER,
+    status TEXT NOT NULL DEFAULT 'Pending',
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_request_id INTEGER REFERENCES event_requests(id),
+    department_id INTEGER NOT NULL REFERENCES users(id),
+    event_name TEXT NOT NULL,
+    description TEXT,
+    location TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    participant_limit INTEGER,
+    approved_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'Active',
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TRIGGER IF NOT EXISTS event_requests_version AFTER UPDATE OF
+    event_name, description, location, date, start_time, end_time, participant_limit, status
+ON event_requests
+FOR EACH ROW WHEN NEW.version IS OLD.version
+BEGIN
+    UPDATE event_requests SET version = OLD.version + 1 WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS events_version AFTER UPDATE OF
+    event_name, description, location, date, start_time, end_time, participant_limit, status
+ON events
+FOR EACH ROW WHEN NEW.version IS OLD.version
+BEGIN
+    UPDATE events SET version = OLD.version + 1 WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS registrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL REFERENCES events(id),
+    student_id INTEGER NOT NULL REFERENCES users(id),
+    registration_status TEXT NOT NULL DEFAULT 'Pending',
+    unique_code TEXT,
+    checked_in_at TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TRIGGER IF NOT EXISTS registrations_touch AFTER UPDATE ON registrations
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE registrations SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS token_revocations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    registration_id TEXT,
+    event_id TEXT,
+    revoked_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    expires_at INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_events_department ON events(department_id, date);
+CREATE INDEX IF NOT EXISTS idx_events_location_date ON events(location, date);
+CREATE INDEX IF NOT EXISTS idx_event_requests_department ON event_requests(department_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_registrations_event ON registrations(event_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_registrations_event_updated ON registrations(event_id, updated_at);
+"""
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+class SQLiteError(Exception):
+    """Raised for invalid queries, mirroring the API errors Supabase returns"""
+
+
+def _identifier(name):
+    if not IDENTIFIER.match(name):
+        raise SQLiteError(f"Invalid identifier: {name}")
+    return f'"{name}"'
+
+
+def _split_top_level(text, sep=","):
+    """Split on `sep` outside parentheses"""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == sep and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _coerce(value):
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _parse_logic(expression):
+    """
+    Translate a PostgREST logic expression (the argument of or_) into SQL
+    e.g. "date.gt.2025-01-01,and(date.eq.2025-01-01,id.gt.5)"
+    """
+    def term(item):
+        for group, joiner in (("and(", " AND "), ("or(", " OR ")):
+            if item.startswith(group) and item.endswith(")"):
+                clauses, params = [], []
+                for sub in _split_top_level(item[len(group):-1]):
+                    sql, sub_params = term(sub)
+                    clauses.append(sql)
+                    params += sub_params
+                return "(" + joiner.join(clauses) + ")", params
+
+        column, op, value = item.split(".", 2)
+        if op == "in":
+            values = [v.strip() for v in value.strip("()").split(",")]
+            return f"{_identifier(column)} IN ({', '.join('?' for _ in values)})", values
+        if op == "is":
+            return f"{_identifier(column)} IS NULL" if value == "null" else f"{_identifier(column)} IS NOT NULL", []
+        if op not in OPERATORS:
+            raise SQLiteError(f"Unsupported operator in logic expression: {op}")
+        return f"{_identifier(column)} {OPERATORS[op]} ?", [value]
+
+    clauses, params = [], []
+    for item in _split_top_level(expression):
+        sql, item_params = term(item)
+        clauses.append(sql)
+        params += item_params
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+class SQLiteQuery:
+    """Chainable query builder with the same surface as the supabase-py builder"""
+
+    def __init__(self, client, table):
+        if table not in TABLES:
+            raise SQLiteError(f"Unknown table: {table}")
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.count = None
+        self.head = False
+        self.payload = None
+        self.filters = []
+        self.orders = []
+        self.limit_value = None
+        self.offset_value = 0
+
+    # -- actions -------------------------------------------------------------
+
+    def select(self, *columns, count=None, head=None):
+        self.action = "select"
+        self.columns = ", ".join(columns) if columns else "*"
+        self.count = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, **kwargs):
+        self.action = "insert"
+        self.payload = json if isinstance(json, list) else [json]
+        return self
+
+    def upsert(self, json, **kwargs):
+        self.action = "upsert"
+        self.payload = json if isinstance(json, list) else [json]
+        return self
+
+    def update(self, json, **kwargs):
+        self.action = "update"
+        self.payload = json
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # -- filters -------------------------------------------------------------
+
+    def _compare(self, column, op, value):
+        self.filters.append((f"{_identifier(column)} {OPERATORS[op]} ?", [_coerce(value)]))
+        return self
+
+    def eq(self, column, value):
+        return self._compare(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._compare(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._compare(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._compare(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._compare(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._compare(column, "lte", value)
+
+    def in_(self, column, values):
+        values = [_coerce(v) for v in values]
+        if not values:
+            self.filters.append(("0", []))
+        else:
+            self.filters.append((f"{_identifier(column)} IN ({', '.join('?' for _ in values)})", values))
+        return self
+
+    def is_(self, column, value):
+        sql = "IS NULL" if value in (None, "null") else "IS NOT NULL"
+        self.filters.append((f"{_identifier(column)} {sql}", []))
+        return self
+
+    def or_(self, filters, reference_table=None):
+        self.filters.append(_parse_logic(filters))
+        return self
+
+    # -- modifiers -----------------------------------------------------------
+
+    def order(self, column, desc=False, **kwargs):
+        self.orders.append(f"{_identifier(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size, **kwargs):
+        self.limit_value = size
+        return self
+
+    def range(self, start, end, **kwargs):
+        self.offset_value = start
+        self.limit_value = end - start + 1
+        return self
+
+    # -- execution -----------------------------------------------------------
+
+    def _where(self):
+        if not self.filters:
+            return "", []
+        params = []
+        for _, filter_params in self.filters:
+            params += filter_params
+        return " WHERE " + " AND ".join(sql for sql, _ in self.filters), params
+
+    def execute(self):
+        with self.client.lock:
+            return getattr(self, f"_execute_{self.action}")()
+
+    def _execute_select(self):
+        conn = self.client.conn
+        where, params = self._where()
+        count = None
+        if self.count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {_identifier(self.table)}{where}", params).fetchone()[0]
+        if self.head:
+            return QueryResponse([], count)
+
+        plain, embeds = self._parse_columns()
+        sql = f"SELECT * FROM {_identifier(self.table)}{where}"
+        if self.orders:
+            sql += " ORDER BY " + ", ".join(self.orders)
+        if self.limit_value is not None:
+            sql += f" LIMIT {int(self.limit_value)} OFFSET {int(self.offset_value)}"
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+        for name, (column, foreign_table, foreign_columns) in embeds.items():
+            self._embed(rows, name, column, foreign_table, foreign_columns)
+
+        if plain != ["*"]:
+            keep = set(plain) | set(embeds)
+            rows = [{k: v for k, v in row.items() if k in keep} for row in rows]
+        return QueryResponse(rows, count)
+
+    def _parse_columns(self):
+        """Split "a, b, users!fk(c, d)" into plain columns and embedded resources"""
+        plain, embeds = [], {}
+        for part in _split_top_level(self.columns):
+            if "(" not in part:
+                plain.append(part)
+                continue
+            target, inner = part.split("(", 1)
+            foreign_columns = [c.strip() for c in inner.rstrip(")").split(",")]
+            if "!" in target:
+                foreign_table, constraint = target.split("!", 1)
+                local_table, column, _ = FOREIGN_KEYS[constraint]
+            else:
+                foreign_table = target
+                matches = [
+                    (t, c) for t, c, ref in FOREIGN_KEYS.values()
+                    if t == self.table and ref == foreign_table
+                ]
+                if len(matches) != 1:
+                    raise SQLiteError(f"Ambiguous or unknown relationship: {self.table} -> {foreign_table}")
+                local_table, column = matches[0]
+            if local_table != self.table:
+                raise SQLiteError(f"{target} does not belong to {self.table}")
+            embeds[foreign_table] = (column, foreign_table, foreign_columns)
+        return plain or ["*"], embeds
+
+    def _embed(self, rows, name, column, foreign_table, foreign_columns):
+        ids = list({row[column] for row in rows if row.get(column) is not None})
+        related = {}
+        if ids:
+            placeholders = ", ".join("?" for _ in ids)
+            for row in self.client.conn.execute(
+                f"SELECT * FROM {_identifier(foreign_table)} WHERE id IN ({placeholders})", ids
+            ):
+                row = dict(row)
+                related[row["id"]] = row if foreign_columns == ["*"] else {c: row.get(c) for c in foreign_columns}
+        for row in rows:
+            row[name] = related.get(row.get(column))
+
+    def _columns_of(self, table):
+        return {row[1] for row in self.client.conn.execute(f"PRAGMA table_info({_identifier(table)})")}
+
+    def _check_columns(self, values):
+        unknown = set(values) - self._columns_of(self.table)
+        if unknown:
+            raise SQLiteError(f"Unknown column(s) for {self.table}: {', '.join(sorted(unknown))}")
+
+    def _fetch_ids(self, ids):
+        if not ids:
+            return []
+        placeholders = ", ".join("?" for _ in ids)
+        return [
+            dict(row) for row in self.client.conn.execute(
+                f"SELECT * FROM {_identifier(self.table)} WHERE id IN ({placeholders}) ORDER BY id", ids
+            )
+        ]
+
+    def _matching_ids(self):
+        where, params = self._where()
+        return [row[0] for row in self.client.conn.execute(f"SELECT id FROM {_identifier(self.table)}{where}", params)]
+
+    def _execute_insert(self):
+        conn = self.client.conn
+        ids = []
+        with conn:
+            for row in self.payload:
+                self._check_columns(row)
+                columns = list(row)
+                cursor = conn.execute(
+                    f"INSERT INTO {_identifier(self.table)} ({', '.join(_identifier(c) for c in columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    [_coerce(row[c]) for c in columns]
+                )
+                ids.append(cursor.lastrowid)
+        return QueryResponse(self._fetch_ids(ids))
+
+    def _execute_upsert(self):
+        conn = self.client.conn
+        ids = []
+        with conn:
+            for row in self.payload:
+                self._check_columns(row)
+                columns = list(row)
+                updates = [c for c in columns if c != "id"]
+                sql = (
+                    f"INSERT INTO {_identifier(self.table)} ({', '.join(_identifier(c) for c in columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})"
+                )
+                if updates:
+                    sql += " ON CONFLICT(id) DO UPDATE SET " + ", ".join(
+                        f"{_identifier(c)} = excluded.{_identifier(c)}" for c in updates
+                    )
+                cursor = conn.execute(sql, [_coerce(row[c]) for c in columns])
+                ids.append(row.get("id") or cursor.lastrowid)
+        return QueryResponse(self._fetch_ids(ids))
+
+    def _execute_update(self):
+        self._check_columns(self.payload)
+        conn = self.client.conn
+        if not self.payload:
+            return QueryResponse(self._fetch_ids(self._matching_ids()))
+        # One statement evaluates the filters and writes, so a conditional update
+        # (e.g. .eq("approved_count", seen)) is atomic across processes sharing the file,
+        # like the single UPDATE PostgREST runs
+        where, params = self._where()
+        columns = list(self.payload)
+        with conn:
+            ids = [row[0] for row in conn.execute(
+                f"UPDATE {_identifier(self.table)} SET {', '.join(f'{_identifier(c)} = ?' for c in columns)}"
+                f"{where} RETURNING id",
+                [_coerce(self.payload[c]) for c in columns] + params
+            ).fetchall()]
+        return QueryResponse(self._fetch_ids(ids))
+
+    def _execute_delete(self):
+        # One statement, so the rows returned are exactly the rows deleted even with
+        # other processes writing the same file
+        where, params = self._where()
+        with self.client.conn as conn:
+            rows = [
+                dict(row) for row in conn.execute(f"DELETE FROM {_identifier(self.table)}{where} RETURNING *", params)
+            ]
+        return QueryResponse(sorted(rows, key=lambda row: row["id"]))
+
+
+class SQLiteFunctionCall:
+    """The database functions of migrations/, each as one SQLite statement"""
+
+    def __init__(self, client, function, params):
+        if not hasattr(self, f"_{function}"):
+            raise SQLiteError(f"Unknown function: {function}")
+        self.client = client
+        self.function = function
+        self.params = params or {}
+
+    def execute(self):
+        with self.client.lock:
+            return getattr(self, f"_{self.function}")(**self.params)
+
+    def _approve_registrations(self, approvals):
+        # migrations/007_approve_registrations.sql
+        with self.client.conn as conn:
+            ids = [row[0] for row in conn.execute(
+                "UPDATE registrations SET registration_status = 'Approved', unique_code = a.unique_code "
+                "FROM (SELECT json_extract(value, '$.id') AS id, json_extract(value, '$.event_id') AS event_id, "
+                "json_extract(value, '$.unique_code') AS unique_code FROM json_each(?)) AS a "
+                "WHERE registrations.id = a.id AND registrations.event_id = a.event_id "
+                "AND registrations.registration_status != 'Approved' RETURNING registrations.id",
+                [json.dumps(approvals)]
+            ).fetchall()]
+        return QueryResponse(self.client.table("registrations")._fetch_ids(ids))
+
+    def _record_check_ins(self, check_ins):
+        # migrations/008_record_check_ins.sql
+        with self.client.conn as conn:
+            changed = conn.execute(
+                "UPDATE registrations SET checked_in_at = c.checked_in_at "
+                "FROM (SELECT json_extract(value, '$.id') AS id, json_extract(value, '$.event_id') AS event_id, "
+                "json_extract(value, '$.checked_in_at') AS checked_in_at FROM json_each(?)) AS c "
+                "WHERE registrations.id = c.id AND registrations.event_id = c.event_id "
+                "AND registrations.registration_status = 'Approved' "
+                "AND (registrations.checked_in_at IS NULL OR registrations.checked_in_at > c.checked_in_at)",
+                [json.dumps(check_ins)]
+            ).rowcount
+        return QueryResponse(changed)
+
+
+class _AuthUser:
+    def __init__(self, email):
+        self.email = email
+        self.email_confirmed_at = datetime.now(timezone.utc)
+
+
+class _AuthResponse:
+    def __init__(self, user):
+        self.user = user
+        self.session = None
+
+
+class SQLiteAuth:
+    """Password check against the users table, standing in for Supabase Auth"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def sign_in_with_password(self, credentials):
+        user = self.client.table("users").select("email, password").eq("email", credentials.get("email")).execute()
+        if not user.data or user.data[0]["password"] != credentials.get("password"):
+            raise SQLiteError("Invalid login credentials")
+        return _AuthResponse(_AuthUser(user.data[0]["email"]))
+
+    def sign_up(self, credentials):
+        return _AuthResponse(_AuthUser(credentials.get("email")))
+
+    def sign_out(self):
+        return None
+
+
+class SQLiteClient(DataClient):
+    """Data client backed by a single SQLite connection shared across threads"""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.auth = SQLiteAuth(self)
+
+    def table(self, name):
+        return SQLiteQuery(self, name)
+
+    def rpc(self, function, params=None):
+        return SQLiteFunctionCall(self, function, params)
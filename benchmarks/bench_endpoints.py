@@ -0,0 +1,360 @@
+"""
+Endpoint benchmarks for the Flask app against the local SQLite backend.
+
+Drives each blueprint route through the Flask test client on a seeded
+dataset and reports latency percentiles plus the number of data-store
+calls (query executions and auth calls) per request.
+
+    python benchmarks/bench_endpoints.py
+    python benchmarks/bench_endpoints.py --events 2000 --requests 2000 --registrations 20000
+    python benchmarks/bench_endpoints.py --latency-ms 30
+    python benchmarks/bench_endpoints.py --save baseline.json
+    python benchmarks/bench_endpoints.py --baseline baseline.json --threshold 1.25
+
+With --baseline the run exits with status 1 if any route's p95 latency grew
+by more than --threshold times, or it makes more data-store calls than before.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The benchmark always runs on the in-process backend
+os.environ["DATA_BACKEND"] = "sqlite"
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+# Follow-up jobs are queued but never run (no worker pool is started), so routes
+# are timed without the work a job worker would do, as in production
+os.environ.setdefault("JOB_WORKERS", "1")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(prefix="cems-bench-"), "jobs.sqlite3"))
+
+from backends import sqlite_backend  # noqa: E402
+from config import supabase as db  # noqa: E402
+import app as app_module  # noqa: E402
+
+LOCATIONS = ["Gymnasium", "AVR", "Auditorium", "Quadrangle", "Library Hall", "Covered Court"]
+PASSWORD = "benchmark"
+
+
+class CallCounter:
+    """Counts data-store round trips by wrapping the local backend's execute()"""
+
+    def __init__(self, latency_ms=0):
+        self.calls = 0
+        latency = latency_ms / 1000
+        original_execute = sqlite_backend.SQLiteQuery.execute
+        original_call = sqlite_backend.SQLiteFunctionCall.execute
+        original_sign_in = sqlite_backend.SQLiteAuth.sign_in_with_password
+        counter = self
+
+        def timed(original):
+            def execute(query):
+                counter.calls += 1
+                # Simulated network round trip, outside the backend's lock
+                if latency:
+                    time.sleep(latency)
+                return original(query)
+            return execute
+
+        def sign_in(auth, credentials):
+            counter.calls += 1
+            return original_sign_in(auth, credentials)
+
+        sqlite_backend.SQLiteQuery.execute = timed(original_execute)
+        sqlite_backend.SQLiteFunctionCall.execute = timed(original_call)
+        sqlite_backend.SQLiteAuth.sign_in_with_password = sign_in
+
+
+def seed(departments, events, requests, registrations, students):
+    """Fill the local database; returns ids used by the scenarios"""
+    rng = random.Random(42)
+    conn = db.conn
+
+    with conn:
+        conn.execute(
+            "INSERT INTO users (full_name, email, password, role) VALUES (?, ?, ?, 'osas')",
+            ("OSAS Office", "osas@bench.local", PASSWORD)
+        )
+        conn.executemany(
+            "INSERT INTO users (full_name, email, password, role, department_name) VALUES (?, ?, ?, 'department', ?)",
+            [(f"Department {d}", f"dept{d}@bench.local", PASSWORD, f"Department {d}") for d in range(departments)]
+        )
+        conn.executemany(
+            "INSERT INTO users (full_name, student_id, email, password, role) VALUES (?, ?, ?, ?, 'student')",
+            [(f"Student {s}", f"S{s:06d}", f"student{s}@bench.local", PASSWORD) for s in range(students)]
+        )
+
+    department_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE role = 'department' ORDER BY id")]
+    student_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE role = 'student'")]
+
+    def slot():
+        start = rng.randrange(7, 18)
+        return (
+            f"{rng.randrange(2020, 2027)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            f"{start:02d}:00:00",
+            f"{start + 1:02d}:00:00"
+        )
+
+    with conn:
+        request_rows = []
+        for i in range(requests):
+            date, start, end = slot()
+            request_rows.append((
+                rng.choice(department_ids), f"Request {i}", "Benchmark request", rng.choice(LOCATIONS),
+                date, start, end, rng.choice([None, 50, 100, 500]),
+                rng.choice(["Pending", "Approved", "Rejected", "Cancelled"])
+            ))
+        conn.executemany(
+            "INSERT INTO event_requests (department_id, event_name, description, location, date, start_time, "
+            "end_time, participant_limit, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            request_rows
+        )
+
+        event_rows = []
+        for i in range(events):
+            date, start, end = slot()
+            event_rows.append((
+                department_ids[i % len(department_ids)], f"Event {i}", "Benchmark event", rng.choice(LOCATIONS),
+                date, start, end, rng.choice([None, 50, 100, 500]),
+                rng.choice(["Active", "Active", "Completed", "Cancelled"])
+            ))
+        conn.executemany(
+            "INSERT INTO events (department_id, event_name, description, location, date, start_time, "
+            "end_time, participant_limit, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            event_rows
+        )
+
+    event_ids = [row[0] for row in conn.execute("SELECT id FROM events ORDER BY id")]
+    with conn:
+        conn.executemany(
+            "INSERT INTO registrations (event_id, student_id, registration_status) VALUES (?, ?, ?)",
+            [
+                (rng.choice(event_ids), rng.choice(student_ids), rng.choice(["Pending", "Pending", "Approved", "Rejected"]))
+                for _ in range(registrations)
+            ]
+        )
+        conn.execute(
+            "UPDATE events SET approved_count = (SELECT COUNT(*) FROM registrations r "
+            "WHERE r.event_id = events.id AND r.registration_status = 'Approved')"
+        )
+
+    # The busiest event of the first department drives the per-event pages
+    busiest = conn.execute(
+        "SELECT r.event_id FROM registrations r JOIN events e ON e.id = r.event_id "
+        "WHERE e.department_id = ? GROUP BY r.event_id ORDER BY COUNT(*) DESC LIMIT 1",
+        (department_ids[0],)
+    ).fetchone()
+    first_event = conn.execute("SELECT id FROM events WHERE department_id = ? LIMIT 1", (department_ids[0],)).fetchone()
+    return {
+        "department_id": department_ids[0],
+        "event_id": (busiest or first_event)[0],
+    }
+
+
+def new_pending_request(department_id, rng):
+    """Insert a fresh pending request for approval scenarios (not timed)"""
+    cursor = db.conn.execute(
+        "INSERT INTO event_requests (department_id, event_name, location, date, start_time, end_time, status) "
+        "VALUES (?, 'Bench approval', ?, ?, '06:00:00', '06:30:00', 'Pending')",
+        (department_id, f"Bench Room {rng.randrange(10 ** 9)}", "2030-01-01")
+    )
+    db.conn.commit()
+    return cursor.lastrowid
+
+
+def new_active_event(department_id, rng):
+    """Insert a fresh active event for cancel/postpone scenarios (not timed)"""
+    cursor = db.conn.execute(
+        "INSERT INTO events (department_id, event_name, location, date, start_time, end_time, status) "
+        "VALUES (?, 'Bench event', ?, '2030-02-01', '06:00:00', '07:00:00', 'Active')",
+        (department_id, f"Bench Hall {rng.randrange(10 ** 9)}")
+    )
+    db.conn.commit()
+    return cursor.lastrowid
+
+
+def new_pending_registrations(department_id, rng, count=100):
+    """Insert a fresh event with `count` pending registrations for bulk approval (not timed)"""
+    event_id = new_active_event(department_id, rng)
+    students = [row[0] for row in db.conn.execute(
+        "SELECT id FROM users WHERE role = 'student' ORDER BY id LIMIT ?", (count,)
+    )]
+    ids = [
+        db.conn.execute(
+            "INSERT INTO registrations (event_id, student_id, registration_status) VALUES (?, ?, 'Pending')",
+            (event_id, student_id)
+        ).lastrowid
+        for student_id in students
+    ]
+    db.conn.commit()
+    return {"event_id": event_id, "action": "approve", "registration_ids": ids}
+
+
+def current_etag(client, url):
+    """ETag of a page as the browser last saw it (not timed)"""
+    return client.get(url).headers.get("ETag", "")
+
+
+def logged_in_client(email):
+    client = app_module.app.test_client()
+    response = client.post("/login", data={"email": email, "password": PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {email}")
+    return client
+
+
+def scenarios(ids, rng):
+    """(name, client, request builder) for every benchmarked route; builders return (method, url, data[, headers])"""
+    department = logged_in_client("dept0@bench.local")
+    osas = logged_in_client("osas@bench.local")
+    anonymous = app_module.app.test_client()
+    event_id = ids["event_id"]
+    department_id = ids["department_id"]
+
+    return [
+        ("login", anonymous,
+         lambda: ("POST", "/login", {"email": "dept0@bench.local", "password": PASSWORD})),
+        ("request_event (GET)", department,
+         lambda: ("GET", "/department/request_event", None)),
+        ("request_event (POST)", department,
+         lambda: ("POST", "/department/request_event", {
+             "event_name": "Bench submission", "description": "", "location": "Bench Lab",
+             "date": "2031-01-01", "start_time": "08:00", "end_time": "09:00", "participant_limit": "30"
+         })),
+        ("view_request_status", department,
+         lambda: ("GET", "/department/request-status", None)),
+        ("view_event_registrations", department,
+         lambda: ("GET", "/department/event-registrations", None)),
+        ("view_event_registration_details", department,
+         lambda: ("GET", f"/department/event-registration-details?event_id={event_id}", None)),
+        ("view_department_events", department,
+         lambda: ("GET", "/department/event-management", None)),
+        ("view_department_events (revalidate)", department,
+         lambda: ("GET", "/department/event-management", None,
+                  {"If-None-Match": current_etag(department, "/department/event-management")})),
+        ("view_all_events", osas,
+         lambda: ("GET", "/osas/event-management", None)),
+        ("view_event_requests", osas,
+         lambda: ("GET", "/osas/event-request-management", None)),
+        ("approve_event_request", osas,
+         lambda: ("GET", f"/osas/approve-event-request?request_id={new_pending_request(department_id, rng)}", None)),
+        ("postpone_osas_event (GET)", osas,
+         lambda: ("GET", f"/osas/postpone-event?event_id={event_id}", None)),
+        ("postpone_osas_event (POST)", osas,
+         lambda: ("POST", f"/osas/postpone-event?event_id={new_active_event(department_id, rng)}", {
+             "new_date": "2030-03-01", "new_start_time": "06:00", "new_end_time": "07:00"
+         })),
+        ("postpone_department_event (POST)", department,
+         lambda: ("POST", f"/department/postpone-event?event_id={new_active_event(department_id, rng)}", {
+             "new_date": "2030-04-01", "new_start_time": "06:00", "new_end_time": "07:00"
+         })),
+        ("bulk_approve_registrations", department,
+         lambda: ("POST", "/department/bulk-registrations", new_pending_registrations(department_id, rng))),
+        ("cancel_osas_event", osas,
+         lambda: ("GET", f"/osas/cancel-event?event_id={new_active_event(department_id, rng)}", None)),
+    ]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(args):
+    rng = random.Random(7)
+    ids = seed(args.departments, args.events, args.requests, args.registrations, args.students)
+    counter = CallCounter(args.latency_ms)
+    results = {}
+
+    for name, client, build in scenarios(ids, rng):
+        if args.only and args.only not in name:
+            continue
+        latencies, calls = [], []
+        for i in range(args.warmup + args.iterations):
+            method, url, data, *headers = build()
+            before = counter.calls
+            started = time.perf_counter()
+            response = client.open(url, method=method, data=data, headers=headers[0] if headers else None)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 500:
+                raise RuntimeError(f"{name} returned {response.status_code}")
+            if i >= args.warmup:
+                latencies.append(elapsed)
+                calls.append(counter.calls - before)
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "calls": max(calls),
+        }
+    return results
+
+
+def report(results, args):
+    print(
+        f"dataset: {args.departments} departments, {args.events} events, {args.requests} requests, "
+        f"{args.registrations} registrations, {args.students} students; {args.iterations} iterations; "
+        f"{args.latency_ms:g} ms simulated latency per call"
+    )
+    print(f"{'route':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls':>8}")
+    for name, stats in results.items():
+        print(f"{name:<36}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['calls']:>8}")
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages against a saved baseline"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * threshold:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} ms -> {stats['p95_ms']:.2f} ms")
+        if stats["calls"] > before["calls"]:
+            regressions.append(f"{name}: data-store calls {before['calls']} -> {stats['calls']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--departments", type=int, default=20)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--registrations", type=int, default=5000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated round-trip time per data-store call")
+    parser.add_argument("--only", help="Only run routes whose name contains this text")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed p95 growth factor in --baseline mode")
+    args = parser.parse_args()
+
+    results = run(args)
+    report(results, args)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Worker boot benchmark: time to import the app and build it in a fresh process.
+
+Each sample runs in a new interpreter so module caches are cold, like a
+freshly (re)started gunicorn worker without --preload.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --samples 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+from config import supabase
+supabase.get()
+connected = time.perf_counter()
+print(imported - started, created - imported, connected - created)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    env.setdefault("SUPABASE_KEY", "benchmark-key")
+
+    samples = []
+    for _ in range(args.samples):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        samples.append([float(value) * 1000 for value in output])
+
+    for index, label in enumerate(("import app", "create_app()", "first data client")):
+        values = [sample[index] for sample in samples]
+        print(f"{label:<20} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
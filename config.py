@@ -1,13 +1,73 @@
 import os
-from supabase import create_client, Client
+import threading
 from dotenv import load_dotenv
+from utils.metrics import InstrumentedClient
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# "supabase" (default) or "sqlite" for a local in-process database
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing Supabase environment variables! Please set SUPABASE_URL and SUPABASE_KEY.")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+def create_data_client():
+    """Build the configured data client, validating its environment variables"""
+    if DATA_BACKEND == "sqlite":
+        from backends.sqlite_backend import SQLiteClient
+
+        client = SQLiteClient(os.getenv("SQLITE_PATH", ":memory:"))
+    elif DATA_BACKEND == "supabase":
+        from supabase import create_client
+
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_KEY")
+
+        if not supabase_url or not supabase_key:
+            raise ValueError("Missing Supabase environment variables! Please set SUPABASE_URL and SUPABASE_KEY.")
+
+        client = create_client(supabase_url, supabase_key)
+    else:
+        raise ValueError(f"Unknown DATA_BACKEND '{DATA_BACKEND}'. Use 'supabase' or 'sqlite'.")
+
+    # Record table, operation, filters, latency and row count of every query
+    return InstrumentedClient(client)
+
+
+class LazyClient:
+    """
+    Creates the data client on first use, once per process
+    A client inherited across fork() is never reused: a new pid gets a new client
+    (and so its own connection pool)
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = self._factory()
+                    self._pid = os.getpid()
+        return self._client
+
+    def reset(self):
+        """Drop the current client; the next use creates a fresh one"""
+        with self._lock:
+            self._client = None
+            self._pid = None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+supabase = LazyClient(create_data_client)
+
+
+def reset_client(connect=False):
+    """Discard the process's data client (e.g. after fork), optionally reconnecting now"""
+    supabase.reset()
+    if connect:
+        supabase.get()
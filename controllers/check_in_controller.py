@@ -0,0 +1,167 @@
+from flask import request, jsonify, g, make_response
+from datetime import datetime, timezone
+from models.check_in import CheckIn
+from models.event_registrations import EventRegistrations
+from utils.auth import login_required
+from utils.conditional import conditional_get
+
+# HTTP status per scan outcome
+SCAN_STATUS_CODES = {"checked_in": 200, "already_checked_in": 409, "unknown": 404, "expired": 410, "revoked": 410}
+
+# Scans accepted per upload; scanners split longer logs
+MAX_SCAN_UPLOAD = 20000
+
+
+def _access_error(department_id, status):
+    """Error response if the current user may not run check-in for this event, else None"""
+    user = g.current_user
+    if user["role"] not in ("department", "osas"):
+        return jsonify(error="Only department and OSAS accounts can check in attendees."), 403
+    
+    # Departments run check-in for their own events; OSAS for any
+    if user["role"] == "department" and department_id != user["id"]:
+        return jsonify(error="This event does not belong to your department."), 403
+    
+    if status != "Active":
+        return jsonify(error=f"Event is {status.lower()}."), 409
+    
+    return None
+
+
+def _load_event_index(event_id, reload=False):
+    """
+    (index, error response) for the event, enforcing who may run its check-in
+    before anything is loaded; `reload` rebuilds the index
+    """
+    if g.current_user["role"] not in ("department", "osas"):
+        return None, _access_error(None, None)
+    
+    index = CheckIn.get_index(event_id, load=False)
+    if index is not None:
+        department_id, status = index.department_id, index.status
+    else:
+        event_response = EventRegistrations.get_event_details(event_id)
+        if not event_response.data:
+            return None, (jsonify(error="Event not found."), 404)
+        department_id, status = event_response.data[0]["department_id"], event_response.data[0]["status"]
+    
+    error = _access_error(department_id, status)
+    if error:
+        return None, error
+    
+    if index is None or reload:
+        index = CheckIn.warm(event_id)
+        if index is None:
+            return None, (jsonify(error="Event not found."), 404)
+    return index, None
+
+
+def _scan_time(value):
+    """Uploaded scan time as a UTC ISO string, or None if unreadable"""
+    try:
+        scanned_at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if scanned_at.tzinfo is None:
+        scanned_at = scanned_at.replace(tzinfo=timezone.utc)
+    # A scanner clock running ahead can't stamp a check-in in the future
+    scanned_at = min(scanned_at.astimezone(timezone.utc), datetime.now(timezone.utc))
+    return scanned_at.replace(microsecond=0).isoformat()
+
+
+@login_required()
+def warm_check_in(event_id):
+    """Load the event's codes into memory before the doors open"""
+    index, error = _load_event_index(event_id, reload=True)
+    if error:
+        return error
+    
+    return jsonify(
+        event_id=index.event_id,
+        registrations=len(index.codes),
+        checked_in=len(index.checked_in())
+    )
+
+
+@login_required()
+def check_in(event_id):
+    """Redeem a scanned registration code for this event"""
+    index, error = _load_event_index(event_id)
+    if error:
+        return error
+    
+    payload = request.get_json(silent=True) or request.form
+    code = (payload.get("code") or "").strip()
+    if not code:
+        return jsonify(error="Scanned code is required."), 400
+    
+    outcome, entry = CheckIn.scan(index, code)
+    body = {"result": outcome}
+    if entry:
+        body.update(
+            registration_id=entry["registration_id"],
+            student_name=entry["student_name"],
+            student_id=entry["student_id"],
+            checked_in_at=entry["checked_in_at"]
+        )
+    return jsonify(body), SCAN_STATUS_CODES[outcome]
+
+
+@login_required()
+@conditional_get("events", "registrations", "attendance")
+def check_in_manifest(event_id):
+    """
+    Download the event's offline manifest for scanner devices
+    ?since=<generated_at of the scanner's manifest> for a delta, ?bloom=1 to include the prefilter
+    """
+    event_response = EventRegistrations.get_event_details(event_id)
+    if not event_response.data:
+        return jsonify(error="Event not found."), 404
+    event = event_response.data[0]
+    
+    error = _access_error(event["department_id"], event["status"])
+    if error:
+        return error
+    
+    since = request.args.get("since", type=int)
+    bloom = request.args.get("bloom") == "1"
+    data, generated_at = CheckIn.build_manifest(event["id"], since=since, bloom=bloom)
+    
+    kind = "delta" if since else "full"
+    response = make_response(data)
+    response.mimetype = "application/octet-stream"
+    response.headers["Content-Disposition"] = f"attachment; filename=event-{event['id']}-{kind}-{generated_at}.cemf"
+    response.headers["X-Manifest-Version"] = str(generated_at)
+    return response
+
+
+@login_required()
+def upload_scans(event_id):
+    """
+    Bulk-ingest a scan log recorded offline:
+    {"scans": [{"code": "...", "scanned_at": "2025-01-01T08:00:00+08:00"}, ...]}
+    Safe to upload the same log again
+    """
+    index, error = _load_event_index(event_id)
+    if error:
+        return error
+    
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get("scans")
+    if not isinstance(entries, list):
+        return jsonify(error="Expected a JSON body with a list of scans."), 400
+    if len(entries) > MAX_SCAN_UPLOAD:
+        return jsonify(error=f"Upload at most {MAX_SCAN_UPLOAD} scans at a time."), 413
+    
+    scans = []
+    invalid = 0
+    for entry in entries:
+        code = str(entry.get("code") or "").strip() if isinstance(entry, dict) else ""
+        scanned_at = _scan_time(entry.get("scanned_at")) if code else None
+        if scanned_at is None:
+            invalid += 1
+        else:
+            scans.append((code, scanned_at))
+    
+    outcomes = CheckIn.ingest(index, scans)
+    return jsonify(received=len(entries), invalid=invalid, **outcomes)
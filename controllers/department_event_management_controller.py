@@ -1,77 +1,78 @@
-from flask import render_template, request, redirect, url_for, flash, session
-from models.event_management import EventManagement
-from models.user import User
+from flask import render_template, request, redirect, url_for, flash, g
+from models.event_management import EventManagement, DEFAULT_PAGE_SIZE
+from models.status_counts import EVENT_STATUSES
+from utils.auth import login_required
+from utils.conditional import conditional_get
+from utils.concurrency import fetch_concurrently
+from utils.fragment_cache import cached_fragment
 
+@login_required(role="department", denied_message="Access denied. Department accounts only.")
+@conditional_get("events")
 def view_department_events():
     """Display all events for a specific department management"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied. Department accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     try:
         # Get department ID from user
         department_id = user["id"]
         
-        # Get all events for this department
-        events_response = EventManagement.get_events_by_department(department_id)
-        events = events_response.data if events_response.data else []
-        
-        # Get event counts for this department
-        counts = EventManagement.get_event_counts_by_status_for_department(department_id)
-        
         # Get filter from query parameters
         status_filter = request.args.get("status", "all")
+        status = status_filter.capitalize() if status_filter.capitalize() in EVENT_STATUSES else None
+        
+        after = request.args.get("after")
+        before = request.args.get("before")
+        page_size = request.args.get("per_page", DEFAULT_PAGE_SIZE, type=int)
         
-        # Filter events if needed
-        if status_filter != "all":
-            events = [e for e in events if e["status"].lower() == status_filter.lower()]
+        def render_event_list():
+            # Get one page of this department's events (filtered by status in the query)
+            # and the status counts at the same time
+            results = fetch_concurrently({
+                "page": lambda: EventManagement.get_events_page(
+                    department_id=department_id,
+                    status=status,
+                    after=after,
+                    before=before,
+                    page_size=page_size
+                ),
+                "counts": lambda: EventManagement.get_event_counts_by_status_for_department(department_id),
+            })
+            page = results["page"].get()
+            html = render_template(
+                "fragments/department_event_list.html",
+                events=page["events"],
+                counts=results["counts"].get({"Active": 0, "Completed": 0, "Cancelled": 0}),
+                status_filter=status_filter,
+                next_cursor=page["next_cursor"],
+                prev_cursor=page["prev_cursor"],
+                # Only as requested, so the default page size keeps clean URLs
+                per_page=request.args.get("per_page", type=int)
+            )
+            # Don't keep zeroed counts from a failed query
+            return html, results["counts"].error is None
         
-        return render_template(
-            "department_event_management.html",
-            user=user,
-            events=events,
-            counts=counts,
-            status_filter=status_filter
+        # Rendered list HTML is reused until an event write bumps the data version
+        event_list = cached_fragment(
+            "department_events", (department_id, status_filter, after, before, page_size), ("events",), render_event_list
         )
+        return render_template("department_event_management.html", user=user, event_list=event_list)
         
     except Exception as e:
         flash(f"Error loading events: {str(e)}", "danger")
-        return render_template(
-            "department_event_management.html",
-            user=user,
+        event_list = render_template(
+            "fragments/department_event_list.html",
             events=[],
             counts={"Active": 0, "Completed": 0, "Cancelled": 0},
-            status_filter="all"
+            status_filter="all",
+            per_page=request.args.get("per_page", type=int)
         )
+        return render_template("department_event_management.html", user=user, event_list=event_list)
 
 
+@login_required(role="department")
 def cancel_department_event():
     """Cancel an event (only if it belongs to the department)"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -94,22 +95,10 @@ def cancel_department_event():
     return redirect(url_for("department_event_management.view_department_events"))
 
 
+@login_required(role="department")
 def postpone_department_event():
     """Postpone/reschedule an event (only if it belongs to the department)"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -143,7 +132,8 @@ def postpone_department_event():
                 return render_template("department_postpone_event.html", user=user, event=event)
             
             success, message = EventManagement.postpone_department_event(
-                event_id, department_id, new_date, new_start_time, new_end_time
+                event_id, department_id, new_date, new_start_time, new_end_time,
+                version=request.form.get("version", type=int)
             )
             
             if success:
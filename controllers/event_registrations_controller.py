@@ -1,71 +1,87 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, g, abort, make_response, Response, stream_with_context
+from werkzeug.utils import secure_filename
+from models.capacity import Capacity, CapacityBusy
 from models.event_registrations import EventRegistrations
-from models.user import User
+from utils.auth import login_required
+from utils.conditional import conditional_get, row_time
+from utils.concurrency import fetch_concurrently
+from utils.fragment_cache import cached_fragment
+from utils.export import stream_csv, stream_xlsx, XLSX_MIMETYPE
+from utils.qr_renderer import get_qr_image, qr_etag
+import hashlib
 
+# Columns available in registration exports: key -> (header, value from a registration row)
+EXPORT_COLUMNS = {
+    "registration_id": ("Registration ID", lambda reg: reg["id"]),
+    "student_name": ("Student Name", lambda reg: (reg.get("users") or {}).get("full_name")),
+    "student_id": ("Student ID", lambda reg: (reg.get("users") or {}).get("student_id")),
+    "email": ("Email", lambda reg: (reg.get("users") or {}).get("email")),
+    "status": ("Status", lambda reg: reg["registration_status"]),
+    "registered_at": ("Registered At", lambda reg: reg.get("created_at")),
+    "unique_code": ("Ticket Code", lambda reg: reg.get("unique_code")),
+}
+DEFAULT_EXPORT_COLUMNS = ["registration_id", "student_name", "student_id", "email", "status", "registered_at"]
+
+def _department_registration_rows():
+    """Validator for the registrations of the department's events (see conditional_get)"""
+    event_ids = EventRegistrations.get_department_event_ids(g.current_user["id"])
+    count, updated_at = EventRegistrations.get_change_marker(event_ids)
+    marker = f"{','.join(map(str, event_ids))}:{count}:{updated_at}"
+    return hashlib.sha256(marker.encode()).hexdigest(), row_time(updated_at) if updated_at else None
+
+
+def _event_registration_rows():
+    """Validator for the registrations of the requested event (see conditional_get)"""
+    event_id = request.args.get("event_id")
+    # Another department's event is never queried (the view refuses it)
+    if not EventRegistrations.check_event_belongs_to_department(event_id, g.current_user["id"]):
+        return "denied", None
+    count, updated_at = EventRegistrations.get_change_marker([event_id])
+    return f"{count}:{updated_at}", row_time(updated_at) if updated_at else None
+
+
+@login_required(role="department", denied_message="Access denied. Department accounts only.")
+@conditional_get("events", "registrations", rows=_department_registration_rows)
 def view_event_registrations():
     """Display all events with their registrations"""
-    # Check if user is logged in and is a department
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied. Department accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     try:
-        # Get all events for this department (including cancelled)
-        events_response = EventRegistrations.get_all_department_events(user["id"])
-        events = events_response.data if events_response.data else []
-        
-        # Get registration counts for each event
-        events_with_counts = []
-        for event in events:
-            counts = EventRegistrations.get_registration_counts_by_event(event["id"])
-            event["registration_counts"] = counts
-            event["total_registrations"] = sum(counts.values())
-            events_with_counts.append(event)
+        def render_event_list():
+            # Get all events for this department (including cancelled)
+            events_response = EventRegistrations.get_all_department_events(user["id"])
+            events = events_response.data if events_response.data else []
+            
+            # Get registration counts for all events in one batched query
+            counts_by_event = EventRegistrations.get_registration_counts_for_events([e["id"] for e in events])
+            events_with_counts = []
+            for event in events:
+                counts = counts_by_event[event["id"]]
+                event["registration_counts"] = counts
+                event["total_registrations"] = sum(counts.values())
+                events_with_counts.append(event)
+            
+            return render_template("fragments/department_event_registration_list.html", events=events_with_counts), True
         
-        return render_template(
-            "department_event_registrations.html",
-            user=user,
-            events=events_with_counts
+        # Rendered list HTML is reused until an event or registration write bumps the
+        # data version, or the rows change outside the app (the validator's marker)
+        event_list = cached_fragment(
+            "department_event_registrations", (user["id"], g.get("page_rows")), ("events", "registrations"),
+            render_event_list
         )
+        return render_template("department_event_registrations.html", user=user, event_list=event_list)
         
     except Exception as e:
         flash(f"Error loading events: {str(e)}", "danger")
-        return render_template(
-            "department_event_registrations.html",
-            user=user,
-            events=[]
-        )
+        event_list = render_template("fragments/department_event_registration_list.html", events=[])
+        return render_template("department_event_registrations.html", user=user, event_list=event_list)
 
 
+@login_required(role="department")
+@conditional_get("events", "registrations", "attendance", rows=_event_registration_rows)
 def view_event_registration_details():
     """Display registrations for a specific event"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -74,12 +90,8 @@ def view_event_registration_details():
         return redirect(url_for("event_registrations.view_event_registrations"))
     
     try:
-        # Verify event belongs to this department
-        if not EventRegistrations.check_event_belongs_to_department(event_id, user["id"]):
-            flash("Access denied. This event does not belong to your department.", "danger")
-            return redirect(url_for("event_registrations.view_event_registrations"))
-        
-        # Get event details
+        # Get event details; the row carries its owner, so nothing else is read
+        # for another department's event
         event_response = EventRegistrations.get_event_details(event_id)
         if not event_response.data:
             flash("Event not found.", "danger")
@@ -87,12 +99,23 @@ def view_event_registration_details():
         
         event = event_response.data[0]
         
+        # Verify event belongs to this department
+        if event["department_id"] != user["id"]:
+            flash("Access denied. This event does not belong to your department.", "danger")
+            return redirect(url_for("event_registrations.view_event_registrations"))
+        
+        # Registrations and counts are independent reads, so fetch them at the same time
+        results = fetch_concurrently({
+            "registrations": lambda: EventRegistrations.get_registrations_by_event(event_id),
+            "counts": lambda: EventRegistrations.get_registration_counts_by_event(event_id),
+        })
+        
         # Get registrations for this event
-        registrations_response = EventRegistrations.get_registrations_by_event(event_id)
+        registrations_response = results["registrations"].get()
         registrations = registrations_response.data if registrations_response.data else []
         
         # Get registration counts
-        counts = EventRegistrations.get_registration_counts_by_event(event_id)
+        counts = results["counts"].get({"Pending": 0, "Approved": 0, "Rejected": 0})
         
         # Get filter from query parameters
         status_filter = request.args.get("status", "all")
@@ -105,6 +128,7 @@ def view_event_registration_details():
             "department_event_registration_details.html",
             user=user,
             event=event,
+            seats_left=Capacity.remaining(event),
             registrations=registrations,
             counts=counts,
             status_filter=status_filter
@@ -115,22 +139,10 @@ def view_event_registration_details():
         return redirect(url_for("event_registrations.view_event_registrations"))
 
 
+@login_required(role="department")
 def approve_registration():
     """Approve a registration and generate QR code"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     registration_id = request.args.get("registration_id")
     event_id = request.args.get("event_id")
@@ -145,36 +157,30 @@ def approve_registration():
             flash("Access denied.", "danger")
             return redirect(url_for("event_registrations.view_event_registrations"))
         
-        # Approve registration
-        result = EventRegistrations.approve_registration(registration_id)
+        # Approve registration (only while the event has seats left)
+        outcome = EventRegistrations.approve_registration(registration_id)
         
-        if result:
+        if outcome == "approved":
             flash("Registration approved successfully! QR code has been generated.", "success")
+        elif outcome == "unchanged":
+            flash("Registration is already approved.", "warning")
+        elif outcome == "full":
+            flash("This event has reached its participant limit. The registration stays pending.", "warning")
         else:
             flash("Error approving registration.", "danger")
             
+    except CapacityBusy as e:
+        flash(str(e), "warning")
     except Exception as e:
         flash(f"Error approving registration: {str(e)}", "danger")
     
     return redirect(url_for("event_registrations.view_event_registration_details", event_id=event_id))
 
 
+@login_required(role="department")
 def reject_registration():
     """Reject a registration"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     registration_id = request.args.get("registration_id")
     event_id = request.args.get("event_id")
@@ -203,22 +209,141 @@ def reject_registration():
     return redirect(url_for("event_registrations.view_event_registration_details", event_id=event_id))
 
 
-def cancel_department_event():
-    """Cancel an event (Department can only cancel their own events)"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
+@login_required(role="department")
+def bulk_update_registrations():
+    """Approve or reject several registrations of one event at once"""
+    user = g.current_user
+    
+    event_id = request.form.get("event_id")
+    action = request.form.get("action")
+    registration_ids = request.form.getlist("registration_ids")
+    
+    if not event_id:
+        flash("Event ID is required.", "danger")
+        return redirect(url_for("event_registrations.view_event_registrations"))
+    
+    if action not in ("approve", "reject") or not registration_ids:
+        flash("Select at least one registration and an action.", "warning")
+        return redirect(url_for("event_registrations.view_event_registration_details", event_id=event_id))
+    
+    try:
+        # Verify event belongs to this department (once for the whole batch)
+        if not EventRegistrations.check_event_belongs_to_department(event_id, user["id"]):
+            flash("Access denied.", "danger")
+            return redirect(url_for("event_registrations.view_event_registrations"))
+        
+        outcomes = EventRegistrations.bulk_update_registrations(event_id, registration_ids, action)
+        
+        done = sum(1 for outcome in outcomes.values() if outcome in ("approved", "rejected"))
+        unchanged = sum(1 for outcome in outcomes.values() if outcome == "unchanged")
+        full = sum(1 for outcome in outcomes.values() if outcome == "full")
+        missing = sum(1 for outcome in outcomes.values() if outcome == "not found")
+        
+        flash(f"{done} registration(s) {'approved' if action == 'approve' else 'rejected'}.", "success")
+        if unchanged:
+            flash(f"{unchanged} registration(s) were already {'approved' if action == 'approve' else 'rejected'}.", "warning")
+        if full:
+            flash(f"{full} registration(s) stay pending: the event has reached its participant limit.", "warning")
+        if missing:
+            flash(f"{missing} registration(s) were not found for this event.", "danger")
+            
+    except CapacityBusy as e:
+        flash(str(e), "warning")
+    except Exception as e:
+        flash(f"Error updating registrations: {str(e)}", "danger")
+    
+    return redirect(url_for("event_registrations.view_event_registration_details", event_id=event_id))
+
+
+@login_required(role="department")
+def export_registrations():
+    """Download an event's registrations as CSV or XLSX, streamed page by page"""
+    user = g.current_user
     
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
+    event_id = request.args.get("event_id")
+    export_format = request.args.get("format", "csv")
+    status_filter = request.args.get("status", "all")
+    columns = [c for c in request.args.get("columns", ",".join(DEFAULT_EXPORT_COLUMNS)).split(",") if c]
+    
+    if not event_id:
+        flash("Event ID is required.", "danger")
+        return redirect(url_for("event_registrations.view_event_registrations"))
     
-    user = user_response.data[0]
+    if export_format not in ("csv", "xlsx") or not columns or any(c not in EXPORT_COLUMNS for c in columns):
+        abort(400)
     
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    if not EventRegistrations.check_event_belongs_to_department(event_id, user["id"]):
+        flash("Access denied. This event does not belong to your department.", "danger")
+        return redirect(url_for("event_registrations.view_event_registrations"))
+    
+    event_response = EventRegistrations.get_event_details(event_id)
+    if not event_response.data:
+        flash("Event not found.", "danger")
+        return redirect(url_for("event_registrations.view_event_registrations"))
+    event = event_response.data[0]
+    
+    # Rows are produced while the response is being sent, one page of registrations at a time
+    status = status_filter.capitalize() if status_filter != "all" else None
+    getters = [EXPORT_COLUMNS[c][1] for c in columns]
+    header = [EXPORT_COLUMNS[c][0] for c in columns]
+    rows = (
+        [getter(reg) for getter in getters]
+        for reg in EventRegistrations.iter_registrations_by_event(event_id, status)
+    )
+    
+    if export_format == "csv":
+        body, mimetype = stream_csv(header, rows), "text/csv"
+    else:
+        body, mimetype = stream_xlsx(header, rows, sheet_name="Registrations"), XLSX_MIMETYPE
+    
+    filename = secure_filename(f"{event['event_name']}-registrations.{export_format}") or f"registrations.{export_format}"
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["Cache-Control"] = "private, no-store"
+    # Ask reverse proxies to pass chunks through instead of buffering the whole file
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required()
+def registration_qr(registration_id, fmt="png"):
+    """Serve the QR image for an approved registration (PNG or SVG)"""
+    user = g.current_user
+    
+    registration_response = EventRegistrations.get_registration_code(registration_id)
+    if not registration_response.data:
+        abort(404)
+    
+    registration = registration_response.data[0]
+    if registration["registration_status"] != "Approved" or not registration["unique_code"]:
+        abort(404)
+    
+    # Students see their own QR, departments the QRs of their events, OSAS any
+    if user["role"] == "student" and registration["student_id"] != user["id"]:
+        abort(403)
+    if user["role"] == "department" and not EventRegistrations.check_event_belongs_to_department(registration["event_id"], user["id"]):
+        abort(403)
+    
+    box_size = max(2, min(request.args.get("size", 10, type=int), 20))
+    etag = qr_etag(registration["unique_code"], fmt, box_size)
+    
+    # Repeat opens are answered without rendering or touching the image cache
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        image = get_qr_image(registration["unique_code"], fmt, box_size)
+        response = make_response(image)
+        response.mimetype = "image/svg+xml" if fmt == "svg" else "image/png"
+    
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, max-age=3600"
+    return response
+
+
+@login_required(role="department")
+def cancel_department_event():
+    """Cancel an event (Department can only cancel their own events)"""
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -241,22 +366,10 @@ def cancel_department_event():
     return redirect(url_for("event_registrations.view_event_registrations"))
 
 
+@login_required(role="department")
 def postpone_department_event():
     """Show postpone event form"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -290,7 +403,10 @@ def postpone_department_event():
             # Import EventManagement to use postpone function
             from models.event_management import EventManagement
             
-            success, message = EventManagement.postpone_event(event_id, new_date, new_start_time, new_end_time)
+            success, message = EventManagement.postpone_event(
+                event_id, new_date, new_start_time, new_end_time,
+                department_id=user["id"], version=request.form.get("version", type=int)
+            )
             
             if success:
                 flash(message, "success")
@@ -1,26 +1,12 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, g
 from models.event_request import EventRequest
-from models.user import User
+from utils.auth import login_required
 from config import supabase
 
+@login_required(role="department", denied_message="Access denied. Department accounts only.")
 def request_event():
     """Handle event request submission"""
-    # Check if user is logged in and is a department
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied. Department accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     if request.method == "POST":
         event_name = request.form.get("event_name")
@@ -1,33 +1,27 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, g
 from models.event_request_management import EventRequestManagement
-from models.user import User
+from utils.auth import login_required
+from utils.conditional import conditional_get
+from utils.concurrency import fetch_concurrently
 
+@login_required(role="osas", denied_message="Access denied. OSAS accounts only.")
+@conditional_get("event_requests")
 def view_event_requests():
     """Display all pending event requests for OSAS approval"""
-    # Check if user is logged in and is OSAS
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "osas":
-        flash("Access denied. OSAS accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     try:
-        # Get all pending requests
-        requests_response = EventRequestManagement.get_all_pending_requests()
+        # Get all pending requests and the request counts at the same time
+        results = fetch_concurrently({
+            "requests": EventRequestManagement.get_all_pending_requests,
+            "counts": EventRequestManagement.get_request_counts_by_status,
+        })
+        
+        requests_response = results["requests"].get()
         requests = requests_response.data if requests_response.data else []
         
         # Get request counts
-        counts = EventRequestManagement.get_request_counts_by_status()
+        counts = results["counts"].get({"Pending": 0, "Approved": 0, "Rejected": 0, "Cancelled": 0})
         
         return render_template(
             "osas_event_request_management.html",
@@ -46,22 +40,10 @@ def view_event_requests():
         )
 
 
+@login_required(role="osas")
 def approve_event_request():
     """Approve an event request with schedule conflict check"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "osas":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     request_id = request.args.get("request_id")
     
@@ -84,22 +66,36 @@ def approve_event_request():
     return redirect(url_for("event_request_management.view_event_requests"))
 
 
-def reject_event_request():
-    """Reject an event request"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
+@login_required(role="osas")
+def bulk_approve_event_requests():
+    """Approve several event requests at once with conflict checks across the batch"""
+    request_ids = request.form.getlist("request_ids")
     
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
+    if not request_ids:
+        flash("Select at least one request to approve.", "warning")
+        return redirect(url_for("event_request_management.view_event_requests"))
     
-    user = user_response.data[0]
+    try:
+        outcomes = EventRequestManagement.approve_requests(request_ids)
+        
+        approved = sum(1 for success, _ in outcomes.values() if success)
+        failed = len(outcomes) - approved
+        
+        if approved:
+            flash(f"{approved} event request(s) approved successfully!", "success")
+        if failed:
+            flash(f"{failed} request(s) not approved (schedule conflict or already processed).", "danger")
+            
+    except Exception as e:
+        flash(f"Error processing requests: {str(e)}", "danger")
     
-    if user["role"] != "osas":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    return redirect(url_for("event_request_management.view_event_requests"))
+
+
+@login_required(role="osas")
+def reject_event_request():
+    """Reject an event request"""
+    user = g.current_user
     
     request_id = request.args.get("request_id")
     
@@ -0,0 +1,27 @@
+from flask import render_template, request, flash
+from utils.auth import login_required
+from utils.jobs import JOB_STATUSES, JOB_WORKERS, queue_stats, recent_jobs
+import sqlite3
+
+@login_required(role="osas", denied_message="Access denied. OSAS accounts only.")
+def view_job_queue():
+    """Display background job queue depth, latency and recent jobs"""
+    status_filter = request.args.get("status", "all")
+    status = status_filter if status_filter in JOB_STATUSES else None
+
+    try:
+        stats = queue_stats()
+        jobs = recent_jobs(status=status, limit=50)
+    except sqlite3.Error as e:
+        print(f"Error reading job queue: {e}")
+        flash("Could not read the job queue.", "danger")
+        stats, jobs = None, []
+
+    return render_template(
+        "osas_job_queue.html",
+        stats=stats,
+        jobs=jobs,
+        status_filter=status_filter,
+        statuses=JOB_STATUSES,
+        workers=JOB_WORKERS
+    )
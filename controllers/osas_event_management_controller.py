@@ -1,74 +1,74 @@
-from flask import render_template, request, redirect, url_for, flash, session
-from models.event_management import EventManagement
-from models.user import User
+from flask import render_template, request, redirect, url_for, flash, g
+from models.event_management import EventManagement, DEFAULT_PAGE_SIZE
+from models.status_counts import EVENT_STATUSES
+from utils.auth import login_required
+from utils.conditional import conditional_get
+from utils.concurrency import fetch_concurrently
+from utils.fragment_cache import cached_fragment
 
+@login_required(role="osas", denied_message="Access denied. OSAS accounts only.")
+@conditional_get("events")
 def view_all_events():
     """Display all events for OSAS management"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "osas":
-        flash("Access denied. OSAS accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     try:
-        # Get all events
-        events_response = EventManagement.get_all_events()
-        events = events_response.data if events_response.data else []
-        
-        # Get event counts
-        counts = EventManagement.get_event_counts_by_status()
-        
         # Get filter from query parameters
         status_filter = request.args.get("status", "all")
+        status = status_filter.capitalize() if status_filter.capitalize() in EVENT_STATUSES else None
+        
+        after = request.args.get("after")
+        before = request.args.get("before")
+        page_size = request.args.get("per_page", DEFAULT_PAGE_SIZE, type=int)
         
-        # Filter events if needed
-        if status_filter != "all":
-            events = [e for e in events if e["status"].lower() == status_filter.lower()]
+        def render_event_list():
+            # Get one page of events (filtered by status in the query)
+            # and the status counts at the same time
+            results = fetch_concurrently({
+                "page": lambda: EventManagement.get_events_page(
+                    status=status,
+                    after=after,
+                    before=before,
+                    page_size=page_size
+                ),
+                "counts": lambda: EventManagement.get_event_counts_by_status(),
+            })
+            page = results["page"].get()
+            html = render_template(
+                "fragments/osas_event_list.html",
+                events=page["events"],
+                counts=results["counts"].get({"Active": 0, "Completed": 0, "Cancelled": 0}),
+                status_filter=status_filter,
+                next_cursor=page["next_cursor"],
+                prev_cursor=page["prev_cursor"],
+                # Only as requested, so the default page size keeps clean URLs
+                per_page=request.args.get("per_page", type=int)
+            )
+            # Don't keep zeroed counts from a failed query
+            return html, results["counts"].error is None
         
-        return render_template(
-            "osas_event_management.html",
-            user=user,
-            events=events,
-            counts=counts,
-            status_filter=status_filter
+        # Rendered list HTML is reused until an event write bumps the data version
+        event_list = cached_fragment(
+            "osas_events", (status_filter, after, before, page_size), ("events",), render_event_list
         )
+        return render_template("osas_event_management.html", user=user, event_list=event_list)
         
     except Exception as e:
         flash(f"Error loading events: {str(e)}", "danger")
-        return render_template(
-            "osas_event_management.html",
-            user=user,
+        event_list = render_template(
+            "fragments/osas_event_list.html",
             events=[],
             counts={"Active": 0, "Completed": 0, "Cancelled": 0},
-            status_filter="all"
+            status_filter="all",
+            per_page=request.args.get("per_page", type=int)
         )
+        return render_template("osas_event_management.html", user=user, event_list=event_list)
 
 
+@login_required(role="osas")
 def cancel_osas_event():
     """Cancel any event (OSAS has override authority)"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "osas":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -90,22 +90,10 @@ def cancel_osas_event():
     return redirect(url_for("osas_event_management.view_all_events"))
 
 
+@login_required(role="osas")
 def postpone_osas_event():
     """Postpone/reschedule any event (OSAS has override authority)"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "osas":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     event_id = request.args.get("event_id")
     
@@ -131,7 +119,9 @@ def postpone_osas_event():
                 flash("Please provide all required fields.", "danger")
                 return render_template("osas_postpone_event.html", user=user, event=event)
             
-            success, message = EventManagement.postpone_event(event_id, new_date, new_start_time, new_end_time)
+            success, message = EventManagement.postpone_event(
+                event_id, new_date, new_start_time, new_end_time, version=request.form.get("version", type=int)
+            )
             
             if success:
                 flash(message, "success")
@@ -1,77 +1,63 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, g
 from models.request_status import RequestStatus
-from models.user import User
+from utils.auth import login_required
+from utils.conditional import conditional_get
+from utils.concurrency import fetch_concurrently
+from utils.fragment_cache import cached_fragment
 
+@login_required(role="department", denied_message="Access denied. Department accounts only.")
+@conditional_get("event_requests")
 def view_request_status():
     """Display all event requests with their status"""
-    # Check if user is logged in and is a department
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied. Department accounts only.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     # Get filter from query parameters
     status_filter = request.args.get("status", "all")
     
     try:
-        # Get requests based on filter
-        if status_filter == "all":
-            requests_response = RequestStatus.get_all_requests_by_department(user["id"])
-        else:
-            requests_response = RequestStatus.get_requests_by_status(user["id"], status_filter.capitalize())
-        
-        requests = requests_response.data if requests_response.data else []
-        
-        # Get status counts for summary
-        status_counts = RequestStatus.count_requests_by_status(user["id"])
+        def render_request_list():
+            # Get requests based on filter and the status counts at the same time
+            if status_filter == "all":
+                fetch_requests = lambda: RequestStatus.get_all_requests_by_department(user["id"])
+            else:
+                fetch_requests = lambda: RequestStatus.get_requests_by_status(user["id"], status_filter.capitalize())
+            
+            results = fetch_concurrently({
+                "requests": fetch_requests,
+                "counts": lambda: RequestStatus.count_requests_by_status(user["id"]),
+            })
+            
+            requests_response = results["requests"].get()
+            html = render_template(
+                "fragments/department_request_list.html",
+                requests=requests_response.data if requests_response.data else [],
+                status_filter=status_filter,
+                status_counts=results["counts"].get({"Pending": 0, "Approved": 0, "Rejected": 0, "Cancelled": 0})
+            )
+            # Don't keep zeroed counts from a failed query
+            return html, results["counts"].error is None
         
-        return render_template(
-            "department_request_status.html",
-            user=user,
-            requests=requests,
-            status_filter=status_filter,
-            status_counts=status_counts
+        # Rendered list HTML is reused until a request write bumps the data version
+        request_list = cached_fragment(
+            "department_requests", (user["id"], status_filter), ("event_requests",), render_request_list
         )
+        return render_template("department_request_status.html", user=user, request_list=request_list)
         
     except Exception as e:
         flash(f"Error loading requests: {str(e)}", "danger")
-        return render_template(
-            "department_request_status.html",
-            user=user,
+        request_list = render_template(
+            "fragments/department_request_list.html",
             requests=[],
             status_filter=status_filter,
             status_counts={"Pending": 0, "Approved": 0, "Rejected": 0, "Cancelled": 0}
         )
+        return render_template("department_request_status.html", user=user, request_list=request_list)
 
 
+@login_required(role="department")
 def delete_request():
     """Delete a pending event request"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     request_id = request.args.get("id")
     
@@ -93,23 +79,10 @@ def delete_request():
     return redirect(url_for("request_status.view_request_status"))
 
 
+@login_required(role="department")
 def edit_request():
     """Edit a pending event request"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     request_id = request.args.get("id")
     
@@ -168,14 +141,15 @@ def edit_request():
                     date=date,
                     start_time=start_time,
                     end_time=end_time,
-                    participant_limit=participant_limit
+                    participant_limit=participant_limit,
+                    version=request.form.get("version", type=int)
                 )
                 
                 if result:
                     flash("Request updated successfully!", "success")
                     return redirect(url_for("request_status.view_request_status"))
                 else:
-                    flash("Cannot update this request.", "warning")
+                    flash("Cannot update this request. It was changed or processed meanwhile; please reload and try again.", "warning")
                     
             except ValueError:
                 flash("Participant limit must be a valid number.", "danger")
@@ -189,23 +163,10 @@ def edit_request():
         return redirect(url_for("request_status.view_request_status"))
 
 
+@login_required(role="department")
 def cancel_request():
     """Cancel a pending event request by changing status to Cancelled"""
-    if "user_email" not in session:
-        flash("Please login first.", "warning")
-        return redirect(url_for("user.login"))
-    
-    # Get user details
-    user_response = User.get_user_by_email(session["user_email"])
-    if not user_response.data:
-        flash("User not found.", "danger")
-        return redirect(url_for("user.login"))
-    
-    user = user_response.data[0]
-    
-    if user["role"] != "department":
-        flash("Access denied.", "danger")
-        return redirect(url_for("home"))
+    user = g.current_user
     
     request_id = request.args.get("id")
     
@@ -1,5 +1,6 @@
 from flask import render_template, request, redirect, url_for, flash, session
 from models.user import User
+from utils.auth import remember_user
 from config import supabase
 
 
@@ -28,6 +29,9 @@ def login():
                     session["user_role"] = u.get("role", "student")
                     session["department_name"] = u.get("department_name", "Department")
                     
+                    # Cache the principal so later requests skip the users lookup
+                    remember_user(u)
+                    
                     flash("Login successful!", "success")
 
                     if u["role"] == "osas":
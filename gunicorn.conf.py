@@ -0,0 +1,42 @@
+import os
+
+# Build the app through the factory; with preload the master imports the
+# code once and workers fork from it
+wsgi_app = "app:create_app()"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Recycle workers periodically; cheap now that boot does not build clients
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+
+def on_starting(server):
+    # Build the fingerprinted static assets once, in the master, unless the existing
+    # build (e.g. kept in a persistent directory) was made from the current sources
+    from utils.assets import assets_stale, build_assets
+    if assets_stale():
+        build_assets()
+
+
+def post_fork(server, worker):
+    # Never share the master's connection pool: open a fresh client per worker
+    from config import reset_client
+    reset_client(connect=True)
+
+
+def when_ready(server):
+    # Background job workers run beside the web workers (utils/jobs.py)
+    from utils.jobs import JOB_WORKERS, start_worker_pool
+    if JOB_WORKERS > 0:
+        server.job_pool = start_worker_pool()
+
+
+def on_exit(server):
+    pool = getattr(server, "job_pool", None)
+    if pool is not None:
+        process, stop = pool
+        stop.set()
+        process.join()
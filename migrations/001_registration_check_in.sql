@@ -0,0 +1,6 @@
+-- QR check-in: attendance time per registration, written by the check-in API
+ALTER TABLE registrations ADD COLUMN IF NOT EXISTS checked_in_at timestamptz;
+
+-- Index build for an event's door list (approved registrations by event)
+CREATE INDEX IF NOT EXISTS registrations_event_status_idx
+    ON registrations (event_id, registration_status);
@@ -0,0 +1,17 @@
+-- Offline check-in manifests: delta manifests list registrations changed since
+-- the scanner's last download, so every update stamps the row
+ALTER TABLE registrations ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION registrations_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS registrations_touch ON registrations;
+CREATE TRIGGER registrations_touch BEFORE UPDATE ON registrations
+    FOR EACH ROW EXECUTE FUNCTION registrations_touch();
+
+CREATE INDEX IF NOT EXISTS registrations_event_updated_idx
+    ON registrations (event_id, updated_at);
@@ -0,0 +1,10 @@
+-- Signed registration tokens revoked before they expire (see utils/tokens.py).
+-- A row revokes the tokens of one registration or, with event_id, of a whole
+-- event that were issued before revoked_at.
+CREATE TABLE IF NOT EXISTS token_revocations (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    registration_id text,
+    event_id text,
+    revoked_at timestamptz NOT NULL DEFAULT now(),
+    CHECK (registration_id IS NOT NULL OR event_id IS NOT NULL)
+);
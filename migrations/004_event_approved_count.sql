@@ -0,0 +1,8 @@
+-- Capacity enforcement: approved seats per event, changed only by
+-- compare-and-set updates (see models/capacity.py)
+ALTER TABLE events ADD COLUMN IF NOT EXISTS approved_count integer NOT NULL DEFAULT 0;
+
+UPDATE events e SET approved_count = (
+    SELECT count(*) FROM registrations r
+    WHERE r.event_id = e.id AND r.registration_status = 'Approved'
+);
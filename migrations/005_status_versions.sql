@@ -0,0 +1,23 @@
+-- Status transitions (models/transitions.py): one conditional UPDATE per
+-- transition, optionally guarded by the version the user's form was rendered
+-- from. The version changes with the row's own fields only, so seat counter
+-- updates (approved_count) don't make an open postpone form stale.
+ALTER TABLE event_requests ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 0;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version = OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS event_requests_version ON event_requests;
+CREATE TRIGGER event_requests_version BEFORE UPDATE OF
+    event_name, description, location, date, start_time, end_time, participant_limit, status
+    ON event_requests FOR EACH ROW EXECUTE FUNCTION bump_version();
+
+DROP TRIGGER IF EXISTS events_version ON events;
+CREATE TRIGGER events_version BEFORE UPDATE OF
+    event_name, description, location, date, start_time, end_time, participant_limit, status
+    ON events FOR EACH ROW EXECUTE FUNCTION bump_version();
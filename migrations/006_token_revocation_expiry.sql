@@ -0,0 +1,7 @@
+-- A revocation is only needed until the tokens it covers expire: expires_at
+-- (epoch seconds) is the latest expiry among them, and rows past it are
+-- deleted when the revocation list is loaded. Rows from before this column
+-- have no expiry and are kept.
+ALTER TABLE token_revocations ADD COLUMN IF NOT EXISTS expires_at bigint;
+
+CREATE INDEX IF NOT EXISTS token_revocations_expires_idx ON token_revocations (expires_at);
@@ -0,0 +1,17 @@
+-- Bulk registration approval (see EventRegistrations._approve_rows): one
+-- statement sets the status and each row's own code, for every row of the
+-- event not already approved, and returns the rows it changed. A row approved
+-- meanwhile by someone else is left alone and not returned.
+-- approvals: [{"id": ..., "event_id": ..., "unique_code": ...}, ...]
+CREATE OR REPLACE FUNCTION approve_registrations(approvals jsonb)
+RETURNS SETOF registrations
+LANGUAGE sql
+AS $$
+    UPDATE registrations r
+    SET registration_status = 'Approved', unique_code = a.unique_code
+    FROM jsonb_populate_recordset(NULL::registrations, approvals) a
+    WHERE r.id = a.id
+      AND r.event_id = a.event_id
+      AND r.registration_status <> 'Approved'
+    RETURNING r.*;
+$$;
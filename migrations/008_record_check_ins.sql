@@ -0,0 +1,22 @@
+-- Offline scan uploads (see CheckIn.record_check_ins): one statement writes
+-- every uploaded check-in of an event. The earliest time wins: a row is only
+-- changed while it has no check-in or a later one, and only while it is still
+-- approved, so a reject or cancel made meanwhile is never undone.
+-- Returns the number of rows changed.
+-- check_ins: [{"id": ..., "event_id": ..., "checked_in_at": ...}, ...]
+CREATE OR REPLACE FUNCTION record_check_ins(check_ins jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    WITH changed AS (
+        UPDATE registrations r
+        SET checked_in_at = c.checked_in_at
+        FROM jsonb_populate_recordset(NULL::registrations, check_ins) c
+        WHERE r.id = c.id
+          AND r.event_id = c.event_id
+          AND r.registration_status = 'Approved'
+          AND (r.checked_in_at IS NULL OR r.checked_in_at > c.checked_in_at)
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM changed;
+$$;
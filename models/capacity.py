@@ -0,0 +1,91 @@
+from config import supabase
+import os
+import random
+import time
+
+# Compare-and-set attempts before giving up on a heavily contended event
+CAPACITY_CAS_ATTEMPTS = int(os.getenv("CAPACITY_CAS_ATTEMPTS", "10"))
+
+
+class CapacityBusy(Exception):
+    """Seat counter kept changing under us; the approval can be retried"""
+
+
+class Capacity:
+    """
+    Approved-seat counters (events.approved_count) against participant_limit
+    Every change is a compare-and-set: one conditional UPDATE ... WHERE
+    approved_count = <value read>, which fails instead of overwriting when
+    another worker changed the counter first, so concurrent approvals can
+    never take more seats than the limit. No registration rows are read.
+    """
+
+    @staticmethod
+    def _read(event_id):
+        event = supabase.table("events").select("approved_count, participant_limit").eq("id", event_id).execute()
+        return event.data[0] if event.data else None
+
+    @staticmethod
+    def _set(event_id, seen, value):
+        """Compare-and-set the counter; True if it still held `seen`"""
+        result = supabase.table("events").update({
+            "approved_count": value
+        }).eq("id", event_id).eq("approved_count", seen).execute()
+        return bool(result.data)
+
+    @staticmethod
+    def _backoff(attempt):
+        # Jittered, so workers that collided don't collide again
+        time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+
+    @staticmethod
+    def reserve(event_id, seats):
+        """
+        Take up to `seats` seats; returns how many were granted (0 when full)
+        Raises CapacityBusy if the counter could not be updated
+        """
+        for attempt in range(CAPACITY_CAS_ATTEMPTS):
+            event = Capacity._read(event_id)
+            if event is None:
+                return 0
+            taken = event["approved_count"] or 0
+            limit = event["participant_limit"]
+            granted = seats if limit is None else max(0, min(seats, limit - taken))
+            if granted == 0:
+                return 0
+            if Capacity._set(event_id, taken, taken + granted):
+                return granted
+            Capacity._backoff(attempt)
+        raise CapacityBusy("Too many approvals for this event at once. Please try again.")
+
+    @staticmethod
+    def release(event_id, seats):
+        """Give back seats of approvals that were undone"""
+        if seats <= 0:
+            return
+        for attempt in range(CAPACITY_CAS_ATTEMPTS):
+            event = Capacity._read(event_id)
+            if event is None:
+                return
+            taken = event["approved_count"] or 0
+            if Capacity._set(event_id, taken, max(0, taken - seats)):
+                return
+            Capacity._backoff(attempt)
+        # The counter now overstates; recount() repairs it
+        print(f"Error releasing {seats} seat(s) of event {event_id}: counter busy")
+
+    @staticmethod
+    def remaining(event):
+        """Seats left for an event row, or None when it has no limit"""
+        if event.get("participant_limit") is None:
+            return None
+        return max(0, event["participant_limit"] - (event.get("approved_count") or 0))
+
+    @staticmethod
+    def recount(event_id):
+        """Reset the counter from the registrations table (repair after manual edits)"""
+        approved = supabase.table("registrations").select("id", count="exact", head=True).eq(
+            "event_id", event_id
+        ).eq("registration_status", "Approved").execute()
+        supabase.table("events").update({"approved_count": approved.count or 0}).eq("id", event_id).execute()
+        return approved.count or 0
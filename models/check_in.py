@@ -0,0 +1,375 @@
+from config import supabase
+from models.event_registrations import EventRegistrations
+from models.token_revocations import TokenRevocations
+from utils.fragment_cache import DataVersion
+from utils.jobs import enqueue
+from utils.manifest import encode_manifest
+from utils.tokens import TokenError, is_signed_token, tokens_enabled, verify_registration_token
+from datetime import datetime, timezone
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Seconds between retries of check-in writes that failed (e.g. the database was unreachable)
+CHECK_IN_FLUSH_INTERVAL = float(os.getenv("CHECK_IN_FLUSH_INTERVAL", "1"))
+
+# Pending check-ins that trigger a retry without waiting for the interval
+CHECK_IN_FLUSH_BATCH = int(os.getenv("CHECK_IN_FLUSH_BATCH", "200"))
+
+# Minimum seconds between reloads of an event's index after registrations change
+# (approvals/rejections made in any worker while the doors are open)
+CHECK_IN_REFRESH_SECONDS = float(os.getenv("CHECK_IN_REFRESH_SECONDS", "2"))
+
+# Delta manifests re-send rows changed this long before the scanner's base, to
+# cover writes that committed after a manifest was read but carry an earlier time
+MANIFEST_DELTA_OVERLAP_MS = int(os.getenv("MANIFEST_DELTA_OVERLAP_MS", "60000"))
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def _parse_time(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _manifest_record(reg):
+    student = reg.get("users") or {}
+    return {
+        "unique_code": reg["unique_code"],
+        "registration_id": reg["id"],
+        "student_id": student.get("student_id"),
+        "student_name": student.get("full_name"),
+        "checked_in": bool(reg.get("checked_in_at")),
+    }
+
+
+class _EventIndex:
+    """unique_code -> approved registration of one event"""
+
+    def __init__(self, event, registrations, version, event_version, checked_in=None):
+        self.event_id = str(event["id"])
+        self.department_id = event["department_id"]
+        self.status = event["status"]
+        self.version = version
+        self.event_version = event_version
+        self.loaded_at = time.time()
+        self.lock = threading.Lock()
+        self.codes = {}
+        # Every token a registration was issued (e.g. re-minted after a postponement)
+        # shares one entry, so check-in state is per registration
+        self.by_registration = {}
+        for reg in registrations:
+            if not reg.get("unique_code"):
+                continue
+            student = reg.get("users") or {}
+            entry = {
+                "registration_id": reg["id"],
+                "student_name": student.get("full_name"),
+                "student_id": student.get("student_id"),
+                # Check-ins accepted here but not flushed yet survive a reload
+                "checked_in_at": reg.get("checked_in_at") or (checked_in or {}).get(str(reg["id"])),
+            }
+            self.codes[reg["unique_code"]] = entry
+            self.by_registration[str(reg["id"])] = entry
+
+    def checked_in(self):
+        return {
+            str(e["registration_id"]): e["checked_in_at"] for e in self.by_registration.values() if e["checked_in_at"]
+        }
+
+
+class _AttendanceBuffer:
+    """Check-ins whose write failed, retried in batches by a background thread"""
+
+    def __init__(self):
+        self.pending = {}   # registration id -> checked_in_at
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def add(self, registration_id, checked_in_at):
+        with self.lock:
+            self.pending[registration_id] = checked_in_at
+            size = len(self.pending)
+            # A thread inherited across fork() does not run in the child
+            if self.thread is None or self.pid != os.getpid():
+                self.thread = threading.Thread(target=self._run, name="check-in-flush", daemon=True)
+                self.pid = os.getpid()
+                self.thread.start()
+        if size >= CHECK_IN_FLUSH_BATCH:
+            self.wake.set()
+
+    def _run(self):
+        while True:
+            self.wake.wait(CHECK_IN_FLUSH_INTERVAL)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write pending check-ins; returns how many were written"""
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return 0
+
+        # One conditional update per distinct timestamp. Rows already checked in are
+        # left alone (the first check-in time wins, even across workers), and so are
+        # registrations rejected since the scan.
+        by_time = {}
+        for registration_id, checked_in_at in batch.items():
+            by_time.setdefault(checked_in_at, []).append(registration_id)
+        written = 0
+        for checked_in_at, ids in by_time.items():
+            try:
+                supabase.table("registrations").update({
+                    "checked_in_at": checked_in_at
+                }).in_("id", ids).eq("registration_status", "Approved").is_("checked_in_at", "null").execute()
+                written += len(ids)
+            except Exception as e:
+                print(f"Error writing check-ins, will retry: {e}")
+                with self.lock:
+                    for registration_id in ids:
+                        self.pending.setdefault(registration_id, checked_in_at)
+        if written:
+            DataVersion.bump("attendance")
+        return written
+
+
+class CheckIn:
+    _indexes = {}       # event id -> _EventIndex
+    _lock = threading.Lock()
+    _buffer = _AttendanceBuffer()
+
+    @staticmethod
+    def _load(event_id, checked_in=None):
+        version = DataVersion.current("registrations")
+        event_version = DataVersion.current("events")
+        event_response = EventRegistrations.get_event_details(event_id)
+        if not event_response.data:
+            return None
+        registrations = EventRegistrations.iter_registrations_by_event(event_id, status="Approved")
+        return _EventIndex(event_response.data[0], registrations, version, event_version, checked_in)
+
+    @staticmethod
+    def _refresh_event(index):
+        """Re-read the event's status and owner after an event write; returns the index, or None if the event is gone"""
+        event_version = DataVersion.current("events")
+        event_response = supabase.table("events").select("status, department_id").eq("id", index.event_id).execute()
+        if not event_response.data:
+            with CheckIn._lock:
+                CheckIn._indexes.pop(index.event_id, None)
+            return None
+        index.status = event_response.data[0]["status"]
+        index.department_id = event_response.data[0]["department_id"]
+        index.event_version = event_version
+        return index
+
+    @staticmethod
+    def warm(event_id):
+        """Load (or reload) an event's code index; returns it, or None if the event doesn't exist"""
+        event_id = str(event_id)
+        previous = CheckIn._indexes.get(event_id)
+        index = CheckIn._load(event_id, previous.checked_in() if previous else None)
+        with CheckIn._lock:
+            if index is None:
+                CheckIn._indexes.pop(event_id, None)
+            else:
+                CheckIn._indexes[event_id] = index
+        return index
+
+    @staticmethod
+    def get_index(event_id, load=True):
+        """
+        The event's index, loading it on first use (unless `load` is False) and
+        reloading it after registration changes
+        """
+        event_id = str(event_id)
+        index = CheckIn._indexes.get(event_id)
+        if index is None:
+            return CheckIn.warm(event_id) if load else None
+        # Event writes are rare and a cancellation must stop check-in at once, so
+        # the status is re-read on every change, without the refresh throttle
+        if DataVersion.current("events") != index.event_version:
+            index = CheckIn._refresh_event(index)
+            if index is None:
+                return None
+        if (
+            DataVersion.current("registrations") != index.version
+            and time.time() - index.loaded_at >= CHECK_IN_REFRESH_SECONDS
+        ):
+            return CheckIn.warm(event_id)
+        return index
+
+    @staticmethod
+    def _resolve(index, code):
+        """
+        (entry, None) for a code admitted to the event, else (None, outcome)
+        Signed tokens are checked by signature, expiry and the revocation list,
+        without a lookup: one approved after the index was loaded is still admitted
+        """
+        if not (tokens_enabled() and is_signed_token(code)):
+            entry = index.codes.get(code)
+            return (entry, None) if entry else (None, "unknown")
+
+        try:
+            claims = verify_registration_token(code)
+        except TokenError as e:
+            return None, "expired" if e.reason == "expired" else "unknown"
+        if claims["event_id"] != index.event_id:
+            return None, "unknown"
+        if TokenRevocations.is_revoked(claims):
+            return None, "revoked"
+
+        entry = index.by_registration.get(claims["registration_id"])
+        if entry is None:
+            with index.lock:
+                entry = index.by_registration.setdefault(claims["registration_id"], {
+                    "registration_id": claims["registration_id"],
+                    "student_name": None,
+                    "student_id": None,
+                    "checked_in_at": None,
+                })
+        return entry, None
+
+    @staticmethod
+    def scan(index, code):
+        """
+        Redeem a scanned code against an event index
+        Returns (outcome, entry): outcome is "checked_in", "already_checked_in",
+        "unknown" (not an approved registration of this event), "revoked" (no
+        longer approved, or a signed token on the revocation list) or "expired"
+        """
+        entry, outcome = CheckIn._resolve(index, code)
+        if entry is None:
+            return outcome, None
+
+        # A check-in this worker saw is refused without a round trip; otherwise the
+        # conditional write decides, since another worker may have checked the
+        # registration in (or it may have been rejected) after the index was loaded
+        with index.lock:
+            if entry["checked_in_at"]:
+                return "already_checked_in", dict(entry)
+        checked_in_at = _now()
+        try:
+            written = supabase.table("registrations").update({
+                "checked_in_at": checked_in_at
+            }).eq("id", entry["registration_id"]).eq("registration_status", "Approved").is_(
+                "checked_in_at", "null"
+            ).execute().data
+        except Exception as e:
+            # Acknowledge the scan and let the flush thread retry the same conditional write
+            print(f"Error writing check-in, will retry: {e}")
+            CheckIn._buffer.add(entry["registration_id"], checked_in_at)
+            written = True
+
+        if not written:
+            current = supabase.table("registrations").select(
+                "checked_in_at, registration_status"
+            ).eq("id", entry["registration_id"]).execute()
+            row = current.data[0] if current.data else None
+            if row is None:
+                return "unknown", None
+            if row["registration_status"] != "Approved":
+                return "revoked", None
+            with index.lock:
+                entry["checked_in_at"] = row["checked_in_at"]
+                return "already_checked_in", dict(entry)
+
+        with index.lock:
+            entry["checked_in_at"] = checked_in_at
+            result = dict(entry)
+        DataVersion.bump("attendance")
+        return "checked_in", result
+
+    @staticmethod
+    def ingest(index, scans):
+        """
+        Record scans uploaded by an offline scanner, [(code, checked_in_at), ...]
+        The earliest check-in time of each registration wins; returns a count per
+        outcome. The codes are checked here, the database write runs as a job.
+        """
+        outcomes = {"checked_in": 0, "already_checked_in": 0, "unknown": 0, "expired": 0, "revoked": 0}
+        earliest = {}
+        for code, checked_in_at in scans:
+            entry, outcome = CheckIn._resolve(index, code)
+            if entry is None:
+                outcomes[outcome] += 1
+                continue
+            with index.lock:
+                current = entry["checked_in_at"]
+                if current and _parse_time(current) <= _parse_time(checked_in_at):
+                    outcomes["already_checked_in"] += 1
+                    continue
+                entry["checked_in_at"] = checked_in_at
+            earliest[str(entry["registration_id"])] = checked_in_at
+            outcomes["checked_in"] += 1
+
+        if earliest:
+            CheckIn._queue_check_ins(index.event_id, earliest)
+        return outcomes
+
+    @staticmethod
+    def _queue_check_ins(event_id, times):
+        """Hand uploaded check-ins {registration id: time} to the job queue as one write"""
+        check_ins = [
+            {"id": registration_id, "event_id": event_id, "checked_in_at": checked_in_at}
+            for registration_id, checked_in_at in sorted(times.items())
+        ]
+        # Uploading the same log again finds the same job
+        digest = hashlib.sha256(json.dumps(check_ins).encode()).hexdigest()
+        job_id = enqueue("record_check_ins", {"check_ins": check_ins}, key=f"record_check_ins:{event_id}:{digest}")
+        if job_id is None:
+            # The queue could not be written; the scans were acknowledged, so write them now
+            CheckIn.record_check_ins(check_ins)
+
+    @staticmethod
+    def record_check_ins(check_ins):
+        """
+        Write check-ins [{"id", "event_id", "checked_in_at"}, ...] with one call
+        (migrations/008): the earliest time wins, and only approved rows are
+        touched, so a reject or cancel made meanwhile is never undone
+        Returns how many rows changed
+        """
+        changed = supabase.rpc("record_check_ins", {"check_ins": check_ins}).execute().data or 0
+        if changed:
+            DataVersion.bump("attendance")
+        return changed
+
+    @staticmethod
+    def build_manifest(event_id, since=None, bloom=False):
+        """
+        Offline manifest of an event's approved registrations (see utils/manifest.py)
+        With `since` (a previous manifest's generated_at), only what changed after it
+        Returns (manifest bytes, generated_at)
+        """
+        generated_at = int(time.time() * 1000)
+        if not since:
+            rows = EventRegistrations.iter_registrations_by_event(event_id, status="Approved")
+            records = [_manifest_record(reg) for reg in rows if reg.get("unique_code")]
+            return encode_manifest(event_id, generated_at, records, bloom=bloom), generated_at
+
+        cutoff = datetime.fromtimestamp((since - MANIFEST_DELTA_OVERLAP_MS) / 1000, tz=timezone.utc)
+        # Same text format as the stored timestamps, so the comparison works on both backends
+        updated_since = cutoff.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+        records, removed = [], []
+        for reg in EventRegistrations.iter_registrations_by_event(event_id, updated_since=updated_since):
+            if reg["registration_status"] == "Approved" and reg.get("unique_code"):
+                records.append(_manifest_record(reg))
+            else:
+                removed.append(reg["id"])
+        return encode_manifest(event_id, generated_at, records, removed, base=since, bloom=bloom), generated_at
+
+    @staticmethod
+    def flush():
+        """Write buffered check-ins now"""
+        return CheckIn._buffer.flush()
+
+
+# Don't lose acknowledged check-ins when a worker exits
+atexit.register(CheckIn.flush)
@@ -1,14 +1,86 @@
 from config import supabase
+from models.status_counts import StatusCounts, EVENT_STATUSES
+from models.schedule_index import ScheduleIndex
+from models.transitions import Transitions
+from utils.jobs import enqueue
+from utils.tokens import tokens_enabled
 from datetime import datetime
+import re
+
+# Keyset pagination limits for event lists
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+CURSOR_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]+$")
 
 class EventManagement:
     @staticmethod
-    def get_all_events():
-        """Get all events with department information"""
-        events = supabase.table("events").select(
+    def get_all_events(status=None):
+        """Get all events with department information (optionally filtered by status)"""
+        query = supabase.table("events").select(
             "*, users!events_department_id_fkey(full_name, department_name, email)"
-        ).order("date", desc=False).execute()
-        return events
+        )
+        if status:
+            query = query.eq("status", status)
+        return query.order("date", desc=False).execute()
+
+    @staticmethod
+    def get_events_page(department_id=None, status=None, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Get one page of events ordered by (date, id) using keyset pagination
+        `after`/`before` are cursors from a previous page; pass at most one
+        Returns {"events": [...], "next_cursor": str|None, "prev_cursor": str|None}
+        """
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        backwards = bool(before)
+        cursor = EventManagement.parse_cursor(before if backwards else after)
+        
+        query = supabase.table("events").select(
+            "*, users!events_department_id_fkey(full_name, department_name, email)"
+        )
+        if department_id is not None:
+            query = query.eq("department_id", department_id)
+        if status:
+            query = query.eq("status", status)
+        if cursor:
+            cursor_date, cursor_id = cursor
+            op = "lt" if backwards else "gt"
+            query = query.or_(f"date.{op}.{cursor_date},and(date.eq.{cursor_date},id.{op}.{cursor_id})")
+        
+        # Fetch one extra row to know whether another page exists in this direction
+        events = query.order("date", desc=backwards).order("id", desc=backwards).limit(page_size + 1).execute()
+        rows = events.data or []
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else cursor is not None
+        return {
+            "events": rows,
+            "next_cursor": EventManagement.make_cursor(rows[-1]) if rows and has_next else None,
+            "prev_cursor": EventManagement.make_cursor(rows[0]) if rows and has_prev else None,
+        }
+
+    @staticmethod
+    def make_cursor(event):
+        """Build a page cursor from an event row"""
+        return f"{event['date']}_{event['id']}"
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """Parse a page cursor into (date, id); returns None if missing or malformed"""
+        if not cursor or "_" not in cursor:
+            return None
+        cursor_date, cursor_id = cursor.split("_", 1)
+        try:
+            datetime.strptime(cursor_date, "%Y-%m-%d")
+        except ValueError:
+            return None
+        # Cursor values are spliced into a PostgREST filter, so only allow id characters
+        if not CURSOR_ID_PATTERN.match(cursor_id):
+            return None
+        return cursor_date, cursor_id
 
     @staticmethod
     def get_active_events():
@@ -26,27 +98,22 @@ class EventManagement:
         ).eq("id", event_id).execute()
 
     @staticmethod
-    def cancel_event(event_id):
-        """Cancel an event (OSAS can cancel any event)"""
+    def cancel_event(event_id, department_id=None):
+        """
+        Cancel an active event (OSAS can cancel any event; pass department_id to
+        cancel only an event of that department)
+        Returns (success: bool, message: str)
+        """
         try:
-            # Check if event exists and is not already cancelled
-            event = supabase.table("events").select("status").eq("id", event_id).execute()
-            
-            if not event.data:
-                return False, "Event not found."
-            
-            current_status = event.data[0]["status"]
-            
-            if current_status == "Cancelled":
-                return False, "Event is already cancelled."
+            event, refusal = Transitions.apply("events", "cancel", event_id, department_id=department_id)
+            if event is None:
+                return False, refusal
             
-            if current_status == "Completed":
-                return False, "Cannot cancel a completed event."
-            
-            # Update status to Cancelled
-            supabase.table("events").update({
-                "status": "Cancelled"
-            }).eq("id", event_id).execute()
+            ScheduleIndex.set_status(event_id, "Cancelled")
+            if tokens_enabled():
+                # Reading every approved code can take many pages; check-in already
+                # refuses a cancelled event, so the revocation can land a moment later
+                enqueue("revoke_event", {"event_id": event_id}, key=f"revoke_event:{event_id}")
             
             return True, "Event cancelled successfully."
         except Exception as e:
@@ -59,74 +126,35 @@ class EventManagement:
         Returns True if conflict exists, False otherwise
         """
         try:
-            # Get all active events for the same date and location
-            query = supabase.table("events").select("*").eq("location", location).eq("date", date).eq("status", "Active")
-            
-            existing_events = query.execute()
-            
-            if not existing_events.data:
-                return False
-            
-            # Convert start_time and end_time to time objects for comparison
-            if isinstance(start_time, str):
-                new_start = datetime.strptime(start_time, "%H:%M:%S").time()
-            else:
-                new_start = start_time
-                
-            if isinstance(end_time, str):
-                new_end = datetime.strptime(end_time, "%H:%M:%S").time()
-            else:
-                new_end = end_time
-            
-            # Check for time overlap with existing events
-            for event in existing_events.data:
-                # Skip if this is the same event being updated
-                if exclude_event_id and event.get("id") == exclude_event_id:
-                    continue
-                
-                # Convert existing event times
-                if isinstance(event["start_time"], str):
-                    existing_start = datetime.strptime(event["start_time"], "%H:%M:%S").time()
-                else:
-                    existing_start = event["start_time"]
-                    
-                if isinstance(event["end_time"], str):
-                    existing_end = datetime.strptime(event["end_time"], "%H:%M:%S").time()
-                else:
-                    existing_end = event["end_time"]
-                
-                # Check for overlap: (StartA < EndB) and (EndA > StartB)
-                if (new_start < existing_end) and (new_end > existing_start):
-                    return True
-            
-            return False
-            
+            # Only active events block the venue
+            return ScheduleIndex.has_conflict(
+                location, date, start_time, end_time,
+                statuses=("Active",),
+                exclude_event_id=exclude_event_id
+            )
         except Exception as e:
             print(f"Error checking schedule conflict: {e}")
             return True  # Assume conflict on error for safety
 
     @staticmethod
-    def postpone_event(event_id, new_date, new_start_time, new_end_time):
+    def postpone_event(event_id, new_date, new_start_time, new_end_time, department_id=None, version=None):
         """
-        Postpone/reschedule an event to a new date/time
+        Postpone/reschedule an active event to a new date/time
+        With department_id, only an event of that department; with version, only
+        if the event has not changed since that version was read
         Returns (success: bool, message: str)
         """
         try:
-            # Get current event details
-            event_response = EventManagement.get_event_by_id(event_id)
+            # The venue and current schedule are needed for the conflict check and token re-issue
+            event_response = supabase.table("events").select(
+                "id, location, date, start_time, end_time, version"
+            ).eq("id", event_id).execute()
             
             if not event_response.data:
                 return False, "Event not found."
             
             event = event_response.data[0]
             
-            # Check if event can be postponed
-            if event["status"] == "Cancelled":
-                return False, "Cannot postpone a cancelled event."
-            
-            if event["status"] == "Completed":
-                return False, "Cannot postpone a completed event."
-            
             # Check for schedule conflict with new date/time
             has_conflict = EventManagement.check_schedule_conflict(
                 location=event["location"],
@@ -139,12 +167,24 @@ class EventManagement:
             if has_conflict:
                 return False, "Schedule conflict detected with the new date/time. Please choose a different time."
             
-            # Update event with new date/time
-            supabase.table("events").update({
-                "date": new_date,
-                "start_time": new_start_time,
-                "end_time": new_end_time
-            }).eq("id", event_id).execute()
+            # Conditional on the version read above, so a concurrent change is never overwritten
+            updated, refusal = Transitions.apply(
+                "events", "postpone", event_id,
+                {"date": new_date, "start_time": new_start_time, "end_time": new_end_time},
+                department_id=department_id,
+                version=event["version"] if version is None else version
+            )
+            if updated is None:
+                return False, refusal
+            
+            ScheduleIndex.add_event(updated)
+            if tokens_enabled():
+                # Re-minting every QR token is slow for a large event; a job worker does it
+                enqueue(
+                    "reissue_tokens",
+                    {"event_id": event_id, "previous": {"date": event["date"], "end_time": event["end_time"]}},
+                    key=f"reissue_tokens:{event_id}:{event['date']}T{event['end_time']}->{new_date}T{new_end_time}"
+                )
             
             return True, "Event postponed/rescheduled successfully!"
             
@@ -154,23 +194,17 @@ class EventManagement:
     @staticmethod
     def get_event_counts_by_status():
         """Get count of events grouped by status"""
-        all_events = supabase.table("events").select("status").execute()
-        
-        counts = {"Active": 0, "Completed": 0, "Cancelled": 0}
-        if all_events.data:
-            for event in all_events.data:
-                status = event.get("status", "Active")
-                counts[status] = counts.get(status, 0) + 1
-        
-        return counts
+        return StatusCounts.count_by_status("events", EVENT_STATUSES)
 
     @staticmethod
-    def get_events_by_department(department_id):
-        """Get all events for a specific department"""
-        events = supabase.table("events").select(
+    def get_events_by_department(department_id, status=None):
+        """Get all events for a specific department (optionally filtered by status)"""
+        query = supabase.table("events").select(
             "*, users!events_department_id_fkey(full_name, department_name, email)"
-        ).eq("department_id", department_id).order("date", desc=False).execute()
-        return events
+        ).eq("department_id", department_id)
+        if status:
+            query = query.eq("status", status)
+        return query.order("date", desc=False).execute()
 
     @staticmethod
     def get_active_events_by_department(department_id):
@@ -183,95 +217,19 @@ class EventManagement:
     @staticmethod
     def get_event_counts_by_status_for_department(department_id):
         """Get count of events grouped by status for a specific department"""
-        department_events = supabase.table("events").select("status").eq("department_id", department_id).execute()
-        
-        counts = {"Active": 0, "Completed": 0, "Cancelled": 0}
-        if department_events.data:
-            for event in department_events.data:
-                status = event.get("status", "Active")
-                counts[status] = counts.get(status, 0) + 1
-        
-        return counts
+        return StatusCounts.count_by_status("events", EVENT_STATUSES, {"department_id": department_id})
 
     @staticmethod
     def cancel_department_event(event_id, department_id):
         """Cancel an event (only if it belongs to the department)"""
-        try:
-            # Check if event exists and belongs to the department
-            event = supabase.table("events").select("status, department_id").eq("id", event_id).execute()
-            
-            if not event.data:
-                return False, "Event not found."
-            
-            event_data = event.data[0]
-            
-            # Check if event belongs to the department
-            if event_data["department_id"] != department_id:
-                return False, "You can only manage events from your own department."
-            
-            current_status = event_data["status"]
-            
-            if current_status == "Cancelled":
-                return False, "Event is already cancelled."
-            
-            if current_status == "Completed":
-                return False, "Cannot cancel a completed event."
-            
-            # Update status to Cancelled
-            supabase.table("events").update({
-                "status": "Cancelled"
-            }).eq("id", event_id).execute()
-            
-            return True, "Event cancelled successfully."
-        except Exception as e:
-            return False, f"Error cancelling event: {str(e)}"
+        return EventManagement.cancel_event(event_id, department_id=department_id)
 
     @staticmethod
-    def postpone_department_event(event_id, department_id, new_date, new_start_time, new_end_time):
+    def postpone_department_event(event_id, department_id, new_date, new_start_time, new_end_time, version=None):
         """
         Postpone/reschedule an event (only if it belongs to the department)
         Returns (success: bool, message: str)
         """
-        try:
-            # Get current event details
-            event_response = EventManagement.get_event_by_id(event_id)
-            
-            if not event_response.data:
-                return False, "Event not found."
-            
-            event = event_response.data[0]
-            
-            # Check if event belongs to the department
-            if event["department_id"] != department_id:
-                return False, "You can only manage events from your own department."
-            
-            # Check if event can be postponed
-            if event["status"] == "Cancelled":
-                return False, "Cannot postpone a cancelled event."
-            
-            if event["status"] == "Completed":
-                return False, "Cannot postpone a completed event."
-            
-            # Check for schedule conflict with new date/time
-            has_conflict = EventManagement.check_schedule_conflict(
-                location=event["location"],
-                date=new_date,
-                start_time=new_start_time,
-                end_time=new_end_time,
-                exclude_event_id=event_id
-            )
-            
-            if has_conflict:
-                return False, "Schedule conflict detected with the new date/time. Please choose a different time."
-            
-            # Update event with new date/time
-            supabase.table("events").update({
-                "date": new_date,
-                "start_time": new_start_time,
-                "end_time": new_end_time
-            }).eq("id", event_id).execute()
-            
-            return True, "Event postponed/rescheduled successfully!"
-            
-        except Exception as e:
-            return False, f"Error postponing event: {str(e)}"
\ No newline at end of file
+        return EventManagement.postpone_event(
+            event_id, new_date, new_start_time, new_end_time, department_id=department_id, version=version
+        )
\ No newline at end of file
@@ -1,8 +1,21 @@
 from config import supabase
+from models.capacity import Capacity, CapacityBusy
+from models.event_management import EventManagement
+from models.token_revocations import TokenRevocations
+from utils.fragment_cache import DataVersion
+from utils.jobs import enqueue
+from utils.tokens import tokens_enabled, mint_registration_token, token_expiry, is_signed_token
+import hashlib
 import uuid
-import qrcode
-from io import BytesIO
-import base64
+
+# Rows per request when scanning registrations (PostgREST caps responses at 1000)
+COUNT_PAGE_SIZE = 1000
+
+# Registrations per page when streaming an export
+EXPORT_PAGE_SIZE = 500
+
+# Registrations per request in bulk approve/reject (keeps the in_() URL short)
+BULK_CHUNK_SIZE = 200
 
 class EventRegistrations:
     @staticmethod
@@ -19,71 +32,298 @@ class EventRegistrations:
         return events
 
     @staticmethod
-    def get_registrations_by_event(event_id):
-        """Get all registrations for a specific event with student details"""
+    def get_registrations_by_event(event_id, status=None, after_id=None, limit=None, updated_since=None):
+        """
+        Get all registrations for a specific event with student details
+        With `limit`, get one page in id order instead, continuing after `after_id`
+        With `updated_since` (ISO time), only rows changed at or after it
+        """
         # Join registrations with users table to get student information
-        registrations = supabase.table("registrations").select(
+        query = supabase.table("registrations").select(
             "*, users!registrations_student_id_fkey(full_name, student_id, email)"
-        ).eq("event_id", event_id).order("created_at", desc=True).execute()
-        return registrations
+        ).eq("event_id", event_id)
+        if status:
+            query = query.eq("registration_status", status)
+        if updated_since:
+            query = query.gte("updated_at", updated_since)
+        if limit is None:
+            return query.order("created_at", desc=True).execute()
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute()
+
+    @staticmethod
+    def iter_registrations_by_event(event_id, status=None, page_size=EXPORT_PAGE_SIZE, updated_since=None):
+        """Yield an event's registrations page by page, holding at most one page in memory"""
+        after_id = None
+        while True:
+            rows = EventRegistrations.get_registrations_by_event(
+                event_id, status, after_id, page_size, updated_since
+            ).data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["id"]
+
+    @staticmethod
+    def get_change_marker(event_ids):
+        """
+        (row count, latest updated_at or None) of the registrations of `event_ids`,
+        in one query on the (event_id, updated_at) index
+        Changes with every insert, update or delete, including ones made outside the app
+        """
+        if not event_ids:
+            return 0, None
+        response = supabase.table("registrations").select("updated_at", count="exact").in_(
+            "event_id", list(event_ids)
+        ).order("updated_at", desc=True).limit(1).execute()
+        return response.count or 0, response.data[0]["updated_at"] if response.data else None
+
+    @staticmethod
+    def get_department_event_ids(department_id):
+        """Ids of a department's events (including cancelled)"""
+        events = supabase.table("events").select("id").eq("department_id", department_id).order("id").execute()
+        return [event["id"] for event in events.data or []]
 
     @staticmethod
     def get_registration_counts_by_event(event_id):
         """Get count of registrations by status for an event"""
-        registrations = supabase.table("registrations").select("registration_status").eq("event_id", event_id).execute()
+        return EventRegistrations.get_registration_counts_for_events([event_id])[event_id]
+
+    @staticmethod
+    def get_registration_counts_for_events(event_ids):
+        """
+        Get count of registrations by status for many events at once
+        Returns {event_id: {"Pending": n, "Approved": n, "Rejected": n}}
+        """
+        counts = {event_id: {"Pending": 0, "Approved": 0, "Rejected": 0} for event_id in event_ids}
+        if not counts:
+            return counts
+        
+        # Query-string ids arrive as str while rows may carry ints, so match on str()
+        keys = {str(event_id): event_id for event_id in counts}
         
-        counts = {"Pending": 0, "Approved": 0, "Rejected": 0}
-        if registrations.data:
-            for reg in registrations.data:
-                status = reg.get("registration_status", "Pending")
-                counts[status] = counts.get(status, 0) + 1
+        # One query for all events; only page when the result hits the API row cap
+        start = 0
+        while True:
+            registrations = supabase.table("registrations").select(
+                "event_id, registration_status"
+            ).in_("event_id", list(counts.keys())).order("id").range(
+                start, start + COUNT_PAGE_SIZE - 1
+            ).execute()
+            rows = registrations.data or []
+            
+            for reg in rows:
+                event_counts = counts[keys[str(reg["event_id"])]]
+                status = reg.get("registration_status") or "Pending"
+                event_counts[status] = event_counts.get(status, 0) + 1
+            
+            if len(rows) < COUNT_PAGE_SIZE:
+                break
+            start += COUNT_PAGE_SIZE
         
         return counts
 
+    @staticmethod
+    def _token_event(event_id):
+        """The event fields a signed token is minted from"""
+        event = supabase.table("events").select("id, date, end_time").eq("id", event_id).execute()
+        return event.data[0] if event.data else None
+
+    @staticmethod
+    def _new_code(registration_id, event):
+        """unique_code for a newly approved registration: a signed token when keys are configured, else a uuid4"""
+        if not tokens_enabled():
+            return str(uuid.uuid4())
+        return mint_registration_token(registration_id, event["id"], token_expiry(event))
+
+    @staticmethod
+    def reissue_tokens(event, previous=None):
+        """
+        Re-mint the signed tokens of an event's approved registrations when it moves
+        later than `previous` (its row before the change), so they don't expire
+        before it starts; tokens already handed out stay valid until their own expiry
+        """
+        if not tokens_enabled():
+            return 0
+        expires_at = token_expiry(event)
+        if previous is not None and expires_at <= token_expiry(previous):
+            return 0
+        reissued = 0
+        for reg in list(EventRegistrations.iter_registrations_by_event(event["id"], status="Approved")):
+            if not reg.get("unique_code") or not is_signed_token(reg["unique_code"]):
+                continue
+            # Only the code is written, and only while the registration is still approved
+            # with the code read above: a reject (or check-in) meanwhile is never undone
+            updated = supabase.table("registrations").update({
+                "unique_code": mint_registration_token(reg["id"], event["id"], expires_at)
+            }).eq("id", reg["id"]).eq("registration_status", "Approved").eq(
+                "unique_code", reg["unique_code"]
+            ).execute()
+            reissued += len(updated.data or [])
+        if reissued:
+            DataVersion.bump("registrations")
+        return reissued
+
+    @staticmethod
+    def _approve_rows(event_id, rows):
+        """
+        Approve registrations of one event, first come first served within its capacity
+        Returns {registration_id: outcome} where outcome is "approved", "unchanged"
+        (approved concurrently by someone else) or "full"
+        """
+        outcomes = {}
+        granted = Capacity.reserve(event_id, len(rows))
+        admitted = rows[:granted]
+        for reg in rows[granted:]:
+            outcomes[str(reg["id"])] = "full"
+        if not admitted:
+            return outcomes
+        
+        # One call sets the status and each row's own code together (see
+        # migrations/007), so no approved row is ever left without a code. It skips
+        # rows already approved, so a registration another staff member approved
+        # meanwhile is neither approved twice nor counted twice.
+        event = EventRegistrations._token_event(event_id) if tokens_enabled() else None
+        approvals = [
+            {"id": reg["id"], "event_id": reg["event_id"], "unique_code": EventRegistrations._new_code(reg["id"], event)}
+            for reg in admitted
+        ]
+        claimed = []
+        try:
+            claimed = supabase.rpc("approve_registrations", {"approvals": approvals}).execute().data or []
+        finally:
+            # Seats of rows not claimed (or of the whole batch after an error) go back
+            Capacity.release(event_id, granted - len(claimed))
+            if claimed:
+                DataVersion.bump("registrations")
+        
+        if claimed:
+            # QR images of the new codes are rendered by a job worker, before students open them
+            codes = sorted(reg["unique_code"] for reg in claimed)
+            digest = hashlib.sha256("\n".join(codes).encode()).hexdigest()
+            enqueue("render_qr_codes", {"codes": codes}, key=f"render_qr_codes:{event_id}:{digest}")
+        
+        for reg in admitted:
+            outcomes[str(reg["id"])] = "unchanged"
+        for reg in claimed:
+            outcomes[str(reg["id"])] = "approved"
+        return outcomes
+
+    @staticmethod
+    def _reject_rows(event_id, rows):
+        """Reject registrations of one event, giving back the seats of approved ones; returns the rejected ids"""
+        rejected = {"registration_status": "Rejected", "unique_code": None}
+        approved_ids = [reg["id"] for reg in rows if reg["registration_status"] == "Approved"]
+        other_ids = [reg["id"] for reg in rows if reg["registration_status"] != "Approved"]
+        
+        # Each update is conditional on the status it was read with, so the seats
+        # released match the approvals actually undone
+        released = []
+        if approved_ids:
+            released = supabase.table("registrations").update(rejected).in_(
+                "id", approved_ids
+            ).eq("registration_status", "Approved").execute().data or []
+            Capacity.release(event_id, len(released))
+        changed = []
+        if other_ids:
+            changed = supabase.table("registrations").update(rejected).in_(
+                "id", other_ids
+            ).neq("registration_status", "Approved").neq("registration_status", "Rejected").execute().data or []
+        
+        if released or changed:
+            DataVersion.bump("registrations")
+        # The codes they held, as read before the update cleared them
+        released_ids = {str(reg["id"]) for reg in released}
+        TokenRevocations.revoke_registrations([reg for reg in rows if str(reg["id"]) in released_ids])
+        return [str(reg["id"]) for reg in released + changed]
+
     @staticmethod
     def approve_registration(registration_id):
-        """Approve a registration and generate QR code"""
+        """
+        Approve a registration by minting its unique code, if the event has a seat left
+        The QR image is pre-rendered by a job, or on its first view (see utils/qr_renderer.py)
+        Returns "approved", "unchanged" (already approved), "full", or None on error
+        """
         try:
-            # Generate unique code
-            unique_code = str(uuid.uuid4())
-            
-            # Generate QR code image
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(unique_code)
-            qr.make(fit=True)
-            
-            # Create QR code image
-            img = qr.make_image(fill_color="black", back_color="white")
+            registration = supabase.table("registrations").select("*").eq("id", registration_id).execute()
+            if not registration.data:
+                return None
+            reg = registration.data[0]
+            if reg["registration_status"] == "Approved":
+                return "unchanged"
             
-            # Convert image to base64 string (for storage or display)
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            qr_code_base64 = base64.b64encode(buffered.getvalue()).decode()
-            
-            # Update registration with approved status and unique code
-            result = supabase.table("registrations").update({
-                "registration_status": "Approved",
-                "unique_code": unique_code
-            }).eq("id", registration_id).execute()
-            
-            return result
+            return EventRegistrations._approve_rows(reg["event_id"], [reg])[str(reg["id"])]
+        except CapacityBusy:
+            raise
         except Exception as e:
             print(f"Error approving registration: {e}")
             return None
 
+    @staticmethod
+    def bulk_update_registrations(event_id, registration_ids, action):
+        """
+        Approve or reject many registrations of one event with batched writes
+        Ownership of the event must be checked by the caller
+        Returns {registration_id: outcome} where outcome is "approved", "rejected",
+        "unchanged" (already in that status), "full" (no seat left) or "not found"
+        """
+        new_status = {"approve": "Approved", "reject": "Rejected"}[action]
+        registration_ids = list(dict.fromkeys(str(rid) for rid in registration_ids))
+        outcomes = {}
+        
+        for start in range(0, len(registration_ids), BULK_CHUNK_SIZE):
+            chunk = registration_ids[start:start + BULK_CHUNK_SIZE]
+            
+            # Only rows of this event are touched, so foreign ids come back as "not found"
+            existing = supabase.table("registrations").select("*").eq(
+                "event_id", event_id
+            ).in_("id", chunk).execute()
+            rows = {str(reg["id"]): reg for reg in (existing.data or [])}
+            
+            pending = []
+            for registration_id in chunk:
+                reg = rows.get(registration_id)
+                if not reg:
+                    outcomes[registration_id] = "not found"
+                elif reg["registration_status"] == new_status:
+                    outcomes[registration_id] = "unchanged"
+                else:
+                    pending.append(reg)
+            if not pending:
+                continue
+            
+            if action == "approve":
+                outcomes.update(EventRegistrations._approve_rows(event_id, pending))
+            else:
+                rejected = set(EventRegistrations._reject_rows(event_id, pending))
+                for reg in pending:
+                    outcomes[str(reg["id"])] = "rejected" if str(reg["id"]) in rejected else "unchanged"
+        
+        return outcomes
+
     @staticmethod
     def reject_registration(registration_id):
-        """Reject a registration"""
-        return supabase.table("registrations").update({
-            "registration_status": "Rejected",
-            "unique_code": None
-        }).eq("id", registration_id).execute()
+        """Reject a registration, freeing its seat if it was approved"""
+        registration = supabase.table("registrations").select("*").eq("id", registration_id).execute()
+        if not registration.data:
+            return registration
+        reg = registration.data[0]
+        EventRegistrations._reject_rows(reg["event_id"], [reg])
+        return supabase.table("registrations").select("*").eq("id", registration_id).execute()
 
     @staticmethod
     def get_registration_by_id(registration_id):
         """Get a specific registration"""
         return supabase.table("registrations").select("*").eq("id", registration_id).execute()
 
+    @staticmethod
+    def get_registration_code(registration_id):
+        """Get the fields needed to serve a registration's QR code"""
+        return supabase.table("registrations").select(
+            "id, event_id, student_id, registration_status, unique_code"
+        ).eq("id", registration_id).execute()
+
     @staticmethod
     def get_event_details(event_id):
         """Get event details with department information"""
@@ -105,29 +345,7 @@ class EventRegistrations:
         Cancel an event (change status to Cancelled)
         If department_id is provided, verify ownership
         """
-        try:
-            # If department_id provided, check ownership
-            if department_id:
-                if not EventRegistrations.check_event_belongs_to_department(event_id, department_id):
-                    return False, "You don't have permission to cancel this event."
-            
-            # Check if event is already cancelled or completed
-            event = supabase.table("events").select("status").eq("id", event_id).execute()
-            if event.data:
-                current_status = event.data[0]["status"]
-                if current_status == "Cancelled":
-                    return False, "Event is already cancelled."
-                if current_status == "Completed":
-                    return False, "Cannot cancel a completed event."
-            
-            # Update event status to Cancelled
-            result = supabase.table("events").update({
-                "status": "Cancelled"
-            }).eq("id", event_id).execute()
-            
-            return True, "Event cancelled successfully."
-        except Exception as e:
-            return False, f"Error cancelling event: {str(e)}"
+        return EventManagement.cancel_event(event_id, department_id=department_id)
 
     @staticmethod
     def get_event_by_id(event_id):
@@ -1,11 +1,12 @@
 from config import supabase
 from datetime import datetime
+from utils.fragment_cache import DataVersion
 
 class EventRequest:
     @staticmethod
     def create_event_request(department_id, event_name, description, location, date, start_time, end_time, participant_limit):
         """Create a new event request"""
-        return supabase.table("event_requests").insert({
+        result = supabase.table("event_requests").insert({
             "department_id": department_id,
             "event_name": event_name,
             "description": description,
@@ -16,6 +17,8 @@ class EventRequest:
             "participant_limit": participant_limit,
             "status": "Pending"
         }).execute()
+        DataVersion.bump("event_requests")
+        return result
 
     @staticmethod
     def get_requests_by_department(department_id):
@@ -30,9 +33,13 @@ class EventRequest:
     @staticmethod
     def update_request_status(request_id, status):
         """Update the status of an event request"""
-        return supabase.table("event_requests").update({"status": status}).eq("id", request_id).execute()
+        result = supabase.table("event_requests").update({"status": status}).eq("id", request_id).execute()
+        DataVersion.bump("event_requests")
+        return result
 
     @staticmethod
     def delete_request(request_id):
         """Delete an event request"""
-        return supabase.table("event_requests").delete().eq("id", request_id).execute()
\ No newline at end of file
+        result = supabase.table("event_requests").delete().eq("id", request_id).execute()
+        DataVersion.bump("event_requests")
+        return result
\ No newline at end of file
@@ -1,5 +1,8 @@
 from config import supabase
-from datetime import datetime, time
+from models.status_counts import StatusCounts, REQUEST_STATUSES
+from models.schedule_index import ScheduleIndex, resolve_batch_conflicts
+from models.transitions import Transitions
+from utils.fragment_cache import DataVersion
 
 class EventRequestManagement:
     @staticmethod
@@ -32,48 +35,11 @@ class EventRequestManagement:
         Returns True if conflict exists, False otherwise
         """
         try:
-            # Get all approved events for the same date and location
-            query = supabase.table("events").select("*").eq("location", location).eq("date", date)
-            
-            existing_events = query.execute()
-            
-            if not existing_events.data:
-                return False
-            
-            # Convert start_time and end_time to time objects for comparison
-            if isinstance(start_time, str):
-                new_start = datetime.strptime(start_time, "%H:%M:%S").time()
-            else:
-                new_start = start_time
-                
-            if isinstance(end_time, str):
-                new_end = datetime.strptime(end_time, "%H:%M:%S").time()
-            else:
-                new_end = end_time
-            
-            # Check for time overlap with existing events
-            for event in existing_events.data:
-                # Skip if this is the same request being updated
-                if exclude_request_id and event.get("event_request_id") == exclude_request_id:
-                    continue
-                
-                # Convert existing event times
-                if isinstance(event["start_time"], str):
-                    existing_start = datetime.strptime(event["start_time"], "%H:%M:%S").time()
-                else:
-                    existing_start = event["start_time"]
-                    
-                if isinstance(event["end_time"], str):
-                    existing_end = datetime.strptime(event["end_time"], "%H:%M:%S").time()
-                else:
-                    existing_end = event["end_time"]
-                
-                # Check for overlap: (StartA < EndB) and (EndA > StartB)
-                if (new_start < existing_end) and (new_end > existing_start):
-                    return True
-            
-            return False
-            
+            # Any existing event at the venue blocks the request
+            return ScheduleIndex.has_conflict(
+                location, date, start_time, end_time,
+                exclude_request_id=exclude_request_id
+            )
         except Exception as e:
             print(f"Error checking schedule conflict: {e}")
             return True  # Assume conflict on error for safety
@@ -108,19 +74,24 @@ class EventRequestManagement:
             
             if has_conflict:
                 # Auto-reject due to conflict
-                supabase.table("event_requests").update({
-                    "status": "Rejected"
-                }).eq("id", request_id).execute()
+                rejected, refusal = Transitions.apply(
+                    "event_requests", "reject", request_id, version=request_data["version"]
+                )
+                if rejected is None:
+                    return False, refusal
                 return False, "Schedule conflict detected. Request automatically rejected."
             
             # No conflict - approve and create event
-            # Update request status
-            supabase.table("event_requests").update({
-                "status": "Approved"
-            }).eq("id", request_id).execute()
+            # Conditional on the version read above: of two concurrent approvals
+            # only one gets here, so the event is created once
+            approved, refusal = Transitions.apply(
+                "event_requests", "approve", request_id, version=request_data["version"]
+            )
+            if approved is None:
+                return False, refusal
             
             # Create event
-            supabase.table("events").insert({
+            created = supabase.table("events").insert({
                 "event_request_id": request_id,
                 "event_name": request_data["event_name"],
                 "description": request_data["description"],
@@ -132,6 +103,9 @@ class EventRequestManagement:
                 "department_id": request_data["department_id"],
                 "status": "Active"
             }).execute()
+            if created.data:
+                ScheduleIndex.add_event(created.data[0])
+            DataVersion.bump("events")
             
             return True, "Event request approved successfully!"
             
@@ -139,6 +113,110 @@ class EventRequestManagement:
             print(f"Error approving request: {e}")
             return False, f"Error approving request: {str(e)}"
 
+    @staticmethod
+    def approve_requests(request_ids):
+        """
+        Approve many event requests at once, rejecting any that conflict with an
+        existing event or with an earlier-submitted request in the same batch
+        Returns {request_id: (success: bool, message: str)}
+        """
+        request_ids = list(dict.fromkeys(str(rid) for rid in request_ids))
+        outcomes = {}
+        if not request_ids:
+            return outcomes
+        
+        # Load all selected requests in one query
+        requests_response = supabase.table("event_requests").select("*").in_("id", request_ids).execute()
+        requests = {str(req["id"]): req for req in (requests_response.data or [])}
+        
+        pending = []
+        for request_id in request_ids:
+            request_data = requests.get(request_id)
+            if not request_data:
+                outcomes[request_id] = (False, "Request not found")
+            elif request_data["status"] != "Pending":
+                outcomes[request_id] = (False, f"Request already {request_data['status'].lower()}")
+            else:
+                pending.append(request_data)
+        
+        if not pending:
+            return outcomes
+        
+        # Load existing events for every affected (location, date) in one query
+        keys = {(req["location"], req["date"]) for req in pending}
+        events_response = supabase.table("events").select(
+            "location, date, start_time, end_time, event_request_id"
+        ).in_("location", list({k[0] for k in keys})).in_("date", list({k[1] for k in keys})).execute()
+        
+        existing_by_key = {}
+        for event in (events_response.data or []):
+            key = (event["location"], event["date"])
+            if key in keys:
+                existing_by_key.setdefault(key, []).append(event)
+        
+        # Earlier submissions win when two requests in the batch overlap
+        pending.sort(key=lambda req: (req.get("created_at") or "", str(req["id"])))
+        candidates_by_key = {}
+        for req in pending:
+            candidates_by_key.setdefault((req["location"], req["date"]), []).append(req)
+        
+        rejected_ids = set()
+        for key, candidates in candidates_by_key.items():
+            candidate_ids = {str(req["id"]) for req in candidates}
+            existing = [
+                (event["start_time"], event["end_time"])
+                for event in existing_by_key.get(key, [])
+                if str(event.get("event_request_id")) not in candidate_ids
+            ]
+            rejected_ids |= resolve_batch_conflicts(
+                existing,
+                [(req["start_time"], req["end_time"], str(req["id"])) for req in candidates]
+            )
+        
+        approved = [req for req in pending if str(req["id"]) not in rejected_ids]
+        
+        # Commit rejections, approvals and new events with one write each; the
+        # status writes are conditional, so requests another reviewer handled
+        # meanwhile are reported instead of processed twice
+        if rejected_ids:
+            claimed = {str(req["id"]) for req in Transitions.apply_many("event_requests", "reject", list(rejected_ids))}
+            for request_id in rejected_ids:
+                if request_id in claimed:
+                    outcomes[request_id] = (False, "Schedule conflict detected. Request automatically rejected.")
+                else:
+                    outcomes[request_id] = (False, "Request was already processed by someone else.")
+        
+        if approved:
+            claimed = {str(req["id"]) for req in Transitions.apply_many(
+                "event_requests", "approve", [str(req["id"]) for req in approved]
+            )}
+            for req in approved:
+                if str(req["id"]) not in claimed:
+                    outcomes[str(req["id"])] = (False, "Request was already processed by someone else.")
+            approved = [req for req in approved if str(req["id"]) in claimed]
+        
+        if approved:
+            created = supabase.table("events").insert([{
+                "event_request_id": req["id"],
+                "event_name": req["event_name"],
+                "description": req["description"],
+                "location": req["location"],
+                "date": req["date"],
+                "start_time": req["start_time"],
+                "end_time": req["end_time"],
+                "participant_limit": req["participant_limit"],
+                "department_id": req["department_id"],
+                "status": "Active"
+            } for req in approved]).execute()
+            for event in (created.data or []):
+                ScheduleIndex.add_event(event)
+            DataVersion.bump("events")
+            
+            for req in approved:
+                outcomes[str(req["id"])] = (True, "Event request approved successfully!")
+        
+        return outcomes
+
     @staticmethod
     def reject_request(request_id):
         """
@@ -146,22 +224,9 @@ class EventRequestManagement:
         Returns (success: bool, message: str)
         """
         try:
-            # Get request details
-            request_response = EventRequestManagement.get_request_by_id(request_id)
-            
-            if not request_response.data:
-                return False, "Request not found"
-            
-            request_data = request_response.data[0]
-            
-            # Check if already processed
-            if request_data["status"] != "Pending":
-                return False, f"Request already {request_data['status'].lower()}"
-            
-            # Update request status to rejected
-            supabase.table("event_requests").update({
-                "status": "Rejected"
-            }).eq("id", request_id).execute()
+            rejected, refusal = Transitions.apply("event_requests", "reject", request_id)
+            if rejected is None:
+                return False, refusal
             
             return True, "Event request rejected."
             
@@ -172,12 +237,4 @@ class EventRequestManagement:
     @staticmethod
     def get_request_counts_by_status():
         """Get count of all requests grouped by status"""
-        all_requests = supabase.table("event_requests").select("status").execute()
-        
-        counts = {"Pending": 0, "Approved": 0, "Rejected": 0, "Cancelled": 0}
-        if all_requests.data:
-            for req in all_requests.data:
-                status = req.get("status", "Pending")
-                counts[status] = counts.get(status, 0) + 1
-        
-        return counts
\ No newline at end of file
+        return StatusCounts.count_by_status("event_requests", REQUEST_STATUSES)
\ No newline at end of file
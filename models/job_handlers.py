@@ -0,0 +1,33 @@
+from models.check_in import CheckIn
+from models.event_registrations import EventRegistrations
+from models.token_revocations import TokenRevocations
+from utils.jobs import job_handler
+from utils.qr_renderer import render_qr_codes
+
+
+@job_handler("reissue_tokens")
+def reissue_tokens(event_id, previous):
+    """Re-mint a postponed event's signed tokens (see EventRegistrations.reissue_tokens)"""
+    # Read the event now: a later postponement may have superseded this job's
+    event = EventRegistrations._token_event(event_id)
+    if event is None:
+        return
+    EventRegistrations.reissue_tokens(event, previous=previous)
+
+
+@job_handler("record_check_ins")
+def record_check_ins(check_ins):
+    """Write an uploaded scan log's check-ins (see CheckIn.record_check_ins)"""
+    CheckIn.record_check_ins(check_ins)
+
+
+@job_handler("revoke_event")
+def revoke_event(event_id):
+    """Revoke every signed token of a cancelled event (see TokenRevocations.revoke_event)"""
+    TokenRevocations.revoke_event(event_id)
+
+
+@job_handler("render_qr_codes")
+def prerender_qr_codes(codes):
+    """Render newly approved codes into the shared QR cache before students open them"""
+    render_qr_codes(codes)
@@ -1,4 +1,6 @@
 from config import supabase
+from models.status_counts import StatusCounts, REQUEST_STATUSES
+from models.transitions import Transitions
 
 class RequestStatus:
     @staticmethod
@@ -14,12 +16,8 @@ class RequestStatus:
     @staticmethod
     def delete_request_by_id(request_id, department_id):
         """Delete a request (only if it belongs to the department and is pending)"""
-        # First verify the request belongs to this department
-        request = supabase.table("event_requests").select("*").eq("id", request_id).eq("department_id", department_id).execute()
-        
-        if request.data and request.data[0]["status"] == "Pending":
-            return supabase.table("event_requests").delete().eq("id", request_id).execute()
-        return None
+        deleted, _ = Transitions.delete("event_requests", request_id, department_id=department_id)
+        return deleted
 
     @staticmethod
     def get_requests_by_status(department_id, status):
@@ -29,42 +27,27 @@ class RequestStatus:
     @staticmethod
     def count_requests_by_status(department_id):
         """Get count of requests grouped by status"""
-        all_requests = supabase.table("event_requests").select("status").eq("department_id", department_id).execute()
-        
-        counts = {"Pending": 0, "Approved": 0, "Rejected": 0, "Cancelled": 0}
-        if all_requests.data:
-            for req in all_requests.data:
-                status = req.get("status", "Pending")
-                counts[status] = counts.get(status, 0) + 1
-        
-        return counts
+        return StatusCounts.count_by_status("event_requests", REQUEST_STATUSES, {"department_id": department_id})
 
     @staticmethod
-    def update_request(request_id, department_id, event_name, description, location, date, start_time, end_time, participant_limit):
-        """Update an event request (only if pending and belongs to department)"""
-        # First verify the request belongs to this department and is pending
-        request = supabase.table("event_requests").select("*").eq("id", request_id).eq("department_id", department_id).execute()
-        
-        if request.data and request.data[0]["status"] == "Pending":
-            return supabase.table("event_requests").update({
-                "event_name": event_name,
-                "description": description,
-                "location": location,
-                "date": date,
-                "start_time": start_time,
-                "end_time": end_time,
-                "participant_limit": participant_limit
-            }).eq("id", request_id).execute()
-        return None
+    def update_request(request_id, department_id, event_name, description, location, date, start_time, end_time, participant_limit, version=None):
+        """
+        Update an event request (only if pending and belongs to department)
+        With version, only if the request has not changed since that version was read
+        """
+        updated, _ = Transitions.apply("event_requests", "edit", request_id, {
+            "event_name": event_name,
+            "description": description,
+            "location": location,
+            "date": date,
+            "start_time": start_time,
+            "end_time": end_time,
+            "participant_limit": participant_limit
+        }, department_id=department_id, version=version)
+        return updated
 
     @staticmethod
     def cancel_request(request_id, department_id):
         """Cancel a request by changing its status to 'Cancelled'"""
-        # First verify the request belongs to this department and is pending
-        request = supabase.table("event_requests").select("*").eq("id", request_id).eq("department_id", department_id).execute()
-        
-        if request.data and request.data[0]["status"] == "Pending":
-            return supabase.table("event_requests").update({
-                "status": "Cancelled"
-            }).eq("id", request_id).execute()
-        return None
\ No newline at end of file
+        cancelled, _ = Transitions.apply("event_requests", "cancel", request_id, department_id=department_id)
+        return cancelled
\ No newline at end of file
@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from config import supabase
+from datetime import datetime
+import bisect
+import os
+import threading
+import time
+
+# Seconds a loaded (location, date) slot is trusted before re-reading it.
+# Other workers' writes only become visible after this, so keep it short.
+SCHEDULE_INDEX_TTL = int(os.getenv("SCHEDULE_INDEX_TTL", "30"))
+
+# (location, date) slots kept per process; the least recently checked are dropped
+SCHEDULE_INDEX_MAX_SLOTS = int(os.getenv("SCHEDULE_INDEX_MAX_SLOTS", "2048"))
+
+
+def parse_time(value):
+    """Convert a "HH:MM:SS" / "HH:MM" string (or time object) to a time object"""
+    if not isinstance(value, str):
+        return value
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time: {value}")
+
+
+class _Slot:
+    """Events at one (location, date), sorted by start time"""
+
+    def __init__(self, events):
+        self.entries = sorted(
+            (parse_time(e["start_time"]), parse_time(e["end_time"]), e.get("id"), e.get("event_request_id"), e.get("status"))
+            for e in events
+        )
+        self.loaded_at = time.time()
+        self._reindex()
+
+    def _reindex(self):
+        self.starts = [entry[0] for entry in self.entries]
+        # max_ends[i] is the latest end among entries[0..i]; it lets a query
+        # stop walking left as soon as no earlier event can reach the new start
+        self.max_ends = []
+        latest = None
+        for entry in self.entries:
+            latest = entry[1] if latest is None or entry[1] > latest else latest
+            self.max_ends.append(latest)
+
+    def add(self, entry):
+        bisect.insort(self.entries, entry)
+        self._reindex()
+
+    def remove(self, event_id):
+        self.entries = [entry for entry in self.entries if str(entry[2]) != str(event_id)]
+        self._reindex()
+
+    def overlaps(self, start, end, statuses=None, exclude_event_id=None, exclude_request_id=None):
+        # Only events starting before `end` can overlap [start, end)
+        i = bisect.bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            entry_start, entry_end, event_id, request_id, status = self.entries[i]
+            i -= 1
+            if entry_end <= start:
+                continue
+            if statuses and status not in statuses:
+                continue
+            if exclude_event_id and str(event_id) == str(exclude_event_id):
+                continue
+            if exclude_request_id and str(request_id) == str(exclude_request_id):
+                continue
+            return True
+        return False
+
+
+class ScheduleIndex:
+    _slots = OrderedDict()  # (location, date) -> _Slot, least recently used first
+    _event_keys = {}        # event id -> (location, date) it is indexed under
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _forget(key, slot):
+        """Drop a slot's events from _event_keys (call with the lock held)"""
+        for entry in slot.entries:
+            if ScheduleIndex._event_keys.get(str(entry[2])) == key:
+                del ScheduleIndex._event_keys[str(entry[2])]
+
+    @staticmethod
+    def _load_slot(location, date):
+        """Read every event at (location, date) and index it"""
+        events = supabase.table("events").select(
+            "id, event_request_id, start_time, end_time, status"
+        ).eq("location", location).eq("date", date).execute()
+        rows = events.data or []
+        slot = _Slot(rows)
+        key = (location, date)
+        with ScheduleIndex._lock:
+            previous = ScheduleIndex._slots.pop(key, None)
+            if previous is not None:
+                ScheduleIndex._forget(key, previous)
+            ScheduleIndex._slots[key] = slot
+            for row in rows:
+                ScheduleIndex._event_keys[str(row["id"])] = key
+            while len(ScheduleIndex._slots) > SCHEDULE_INDEX_MAX_SLOTS:
+                ScheduleIndex._forget(*ScheduleIndex._slots.popitem(last=False))
+        return slot
+
+    @staticmethod
+    def _get_slot(location, date):
+        with ScheduleIndex._lock:
+            slot = ScheduleIndex._slots.get((location, date))
+            if slot is not None:
+                ScheduleIndex._slots.move_to_end((location, date))
+        if slot is None or time.time() - slot.loaded_at > SCHEDULE_INDEX_TTL:
+            slot = ScheduleIndex._load_slot(location, date)
+        return slot
+
+    @staticmethod
+    def has_conflict(location, date, start_time, end_time, statuses=None, exclude_event_id=None, exclude_request_id=None):
+        """
+        Check whether [start_time, end_time) overlaps an indexed event at (location, date)
+        `statuses` limits which events count (None means any status)
+        """
+        slot = ScheduleIndex._get_slot(location, date)
+        with ScheduleIndex._lock:
+            return slot.overlaps(
+                parse_time(start_time),
+                parse_time(end_time),
+                statuses=statuses,
+                exclude_event_id=exclude_event_id,
+                exclude_request_id=exclude_request_id
+            )
+
+    @staticmethod
+    def add_event(event):
+        """Index a new or rescheduled event row (needs id, location, date, times and status)"""
+        ScheduleIndex.remove_event(event["id"])
+        key = (event["location"], event["date"])
+        entry = (
+            parse_time(event["start_time"]),
+            parse_time(event["end_time"]),
+            event["id"],
+            event.get("event_request_id"),
+            event.get("status", "Active")
+        )
+        with ScheduleIndex._lock:
+            slot = ScheduleIndex._slots.get(key)
+            # Slots that were never loaded are read fresh on their first check
+            if slot is not None:
+                slot.add(entry)
+                ScheduleIndex._event_keys[str(event["id"])] = key
+
+    @staticmethod
+    def remove_event(event_id):
+        """Drop an event from the index"""
+        with ScheduleIndex._lock:
+            key = ScheduleIndex._event_keys.pop(str(event_id), None)
+            slot = ScheduleIndex._slots.get(key) if key else None
+            if slot is not None:
+                slot.remove(event_id)
+
+    @staticmethod
+    def set_status(event_id, status):
+        """Record a status change (e.g. cancellation) for an indexed event"""
+        with ScheduleIndex._lock:
+            key = ScheduleIndex._event_keys.get(str(event_id))
+            slot = ScheduleIndex._slots.get(key) if key else None
+            if slot is None:
+                return
+            slot.entries = [
+                entry[:4] + (status,) if str(entry[2]) == str(event_id) else entry
+                for entry in slot.entries
+            ]
+
+
+def resolve_batch_conflicts(existing, candidates):
+    """
+    Decide which candidates of one (location, date) can be booked together
+    `existing` is a list of (start, end) already booked; `candidates` is a list of
+    (start, end, key) in priority order. Candidates overlapping an existing event
+    or a higher-priority accepted candidate are rejected.
+    Returns the set of rejected candidate keys.
+
+    A sweep over start times splits the day into clusters of transitively
+    overlapping intervals, so only intervals inside the same cluster are compared.
+    """
+    priority = {candidate[2]: rank for rank, candidate in enumerate(candidates)}
+    items = [(parse_time(s), parse_time(e), None) for s, e in existing]
+    items += [(parse_time(s), parse_time(e), key) for s, e, key in candidates]
+    items.sort(key=lambda item: (item[0], item[1]))
+
+    rejected = set()
+    cluster = []
+    cluster_end = None
+
+    def settle(cluster):
+        booked = [(s, e) for s, e, key in cluster if key is None]
+        pending = sorted((item for item in cluster if item[2] is not None), key=lambda item: priority[item[2]])
+        for s, e, key in pending:
+            if any(s < booked_end and e > booked_start for booked_start, booked_end in booked):
+                rejected.add(key)
+            else:
+                booked.append((s, e))
+
+    for item in items:
+        if cluster and item[0] >= cluster_end:
+            settle(cluster)
+            cluster = []
+        cluster.append(item)
+        cluster_end = item[1] if len(cluster) == 1 else max(cluster_end, item[1])
+    if cluster:
+        settle(cluster)
+
+    return rejected
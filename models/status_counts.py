@@ -0,0 +1,26 @@
+from config import supabase
+
+EVENT_STATUSES = ("Active", "Completed", "Cancelled")
+REQUEST_STATUSES = ("Pending", "Approved", "Rejected", "Cancelled")
+
+class StatusCounts:
+    @staticmethod
+    def count_rows(table, filters=None):
+        """Count rows matching equality filters without transferring them"""
+        query = supabase.table(table).select("id", count="exact", head=True)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        return query.execute().count or 0
+
+    @staticmethod
+    def count_by_status(table, statuses, filters=None, status_column="status"):
+        """
+        Count rows per status with one head-only count query per status
+        Returns {status: count} for every status in `statuses`
+        """
+        counts = {}
+        for status in statuses:
+            status_filters = dict(filters or {})
+            status_filters[status_column] = status
+            counts[status] = StatusCounts.count_rows(table, status_filters)
+        return counts
@@ -0,0 +1,137 @@
+from config import supabase
+from utils.fragment_cache import DataVersion
+from utils.tokens import is_signed_token, token_expires_at, token_expiry, tokens_enabled
+from datetime import datetime, timezone
+import os
+import threading
+import time
+
+# Rows per request when loading the revocation list (PostgREST caps responses at 1000)
+REVOCATION_PAGE_SIZE = 1000
+
+# Upper bound on the age of the in-memory list: the data version only sees
+# revocations made on this host, so ones made on another host show up within this
+REVOCATION_MAX_AGE = int(os.getenv("REVOCATION_MAX_AGE", "60"))
+
+
+def _epoch_ms(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+class TokenRevocations:
+    """
+    Signed tokens revoked before they expire: a registration rejected after
+    approval, or every registration of a cancelled event
+    Kept in memory and reloaded when the "revocations" data version changes or
+    the list is REVOCATION_MAX_AGE old, so checking a token is a dict lookup
+    """
+    _version = None
+    _loaded_at = 0.0
+    _registrations = {}     # registration id -> revoked at (epoch ms)
+    _events = {}            # event id -> revoked at (epoch ms)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def revoke_registrations(registrations):
+        """
+        Revoke tokens issued so far to these registrations (rows with id, event_id and the
+        unique_code they held); a re-approval mints a newer one
+        """
+        if not tokens_enabled():
+            return
+        registrations = [reg for reg in registrations if reg.get("unique_code") and is_signed_token(reg["unique_code"])]
+        if not registrations:
+            return
+        # A re-issue racing the reject may have minted a token expiring with the
+        # event's current schedule, after the code that was read
+        event_ids = list({str(reg["event_id"]) for reg in registrations})
+        events = supabase.table("events").select("id, date, end_time").in_("id", event_ids).execute()
+        event_expiry = {str(event["id"]): token_expiry(event) for event in (events.data or [])}
+        rows = [
+            {
+                "registration_id": str(reg["id"]),
+                "expires_at": max(token_expires_at(reg["unique_code"]) or 0, event_expiry.get(str(reg["event_id"]), 0))
+            }
+            for reg in registrations
+        ]
+        supabase.table("token_revocations").insert(rows).execute()
+        DataVersion.bump("revocations")
+
+    @staticmethod
+    def revoke_event(event_id):
+        """Revoke every token issued for an event"""
+        if not tokens_enabled():
+            return
+        # Re-issues only ever extend expiry, so each approved registration's current
+        # code is its latest-expiring token
+        expires_at = None
+        start = 0
+        while True:
+            codes = supabase.table("registrations").select("unique_code").eq("event_id", event_id).eq(
+                "registration_status", "Approved"
+            ).order("id").range(start, start + REVOCATION_PAGE_SIZE - 1).execute().data or []
+            for reg in codes:
+                expiry = token_expires_at(reg.get("unique_code"))
+                if expiry is not None and (expires_at is None or expiry > expires_at):
+                    expires_at = expiry
+            if len(codes) < REVOCATION_PAGE_SIZE:
+                break
+            start += REVOCATION_PAGE_SIZE
+        if expires_at is None:
+            return
+        supabase.table("token_revocations").insert({"event_id": str(event_id), "expires_at": expires_at}).execute()
+        DataVersion.bump("revocations")
+
+    @staticmethod
+    def _fresh(version):
+        return (
+            version == TokenRevocations._version
+            and time.time() - TokenRevocations._loaded_at < REVOCATION_MAX_AGE
+        )
+
+    @staticmethod
+    def _load():
+        version = DataVersion.current("revocations")
+        if TokenRevocations._fresh(version):
+            return
+        with TokenRevocations._lock:
+            if TokenRevocations._fresh(version):
+                return
+            registrations, events = {}, {}
+            now = int(time.time())
+            try:
+                # Expired tokens fail verification anyway, so their revocations can go
+                supabase.table("token_revocations").delete().lt("expires_at", now).execute()
+                rows = []
+                while True:
+                    page = supabase.table("token_revocations").select(
+                        "registration_id, event_id, revoked_at"
+                    ).order("id").range(len(rows), len(rows) + REVOCATION_PAGE_SIZE - 1).execute().data or []
+                    rows += page
+                    if len(page) < REVOCATION_PAGE_SIZE:
+                        break
+            except Exception as e:
+                # Keep checking against the last list; the next scan retries
+                print(f"Error loading token revocations: {e}")
+                return
+            for row in rows:
+                revoked_at = _epoch_ms(row["revoked_at"])
+                target = registrations if row.get("registration_id") else events
+                key = row.get("registration_id") or row.get("event_id")
+                target[key] = max(target.get(key, 0), revoked_at)
+            TokenRevocations._registrations, TokenRevocations._events = registrations, events
+            TokenRevocations._version = version
+            TokenRevocations._loaded_at = now
+
+    @staticmethod
+    def is_revoked(claims):
+        """Whether a verified token was issued before its registration or event was revoked"""
+        TokenRevocations._load()
+        issued_at = claims["issued_at"]
+        return (
+            issued_at <= TokenRevocations._registrations.get(claims["registration_id"], -1)
+            or issued_at <= TokenRevocations._events.get(claims["event_id"], -1)
+        )
@@ -0,0 +1,96 @@
+from config import supabase
+from utils.fragment_cache import DataVersion
+
+# (table, action) -> (statuses the row may be in, status it moves to; None keeps it)
+TRANSITIONS = {
+    ("events", "cancel"): (("Active",), "Cancelled"),
+    ("events", "postpone"): (("Active",), None),
+    ("event_requests", "approve"): (("Pending",), "Approved"),
+    ("event_requests", "reject"): (("Pending",), "Rejected"),
+    ("event_requests", "cancel"): (("Pending",), "Cancelled"),
+    ("event_requests", "edit"): (("Pending",), None),
+    ("event_requests", "delete"): (("Pending",), None),
+}
+
+NOUNS = {"events": "event", "event_requests": "request"}
+
+
+class Transitions:
+    """
+    Status changes of events and event requests as single conditional writes
+    Each allowed transition is one UPDATE ... WHERE id = ? AND status IN (...)
+    [AND department_id = ?] [AND version = ?] returning the changed rows, so the
+    status and ownership checks cost no extra round trip and two concurrent
+    transitions of the same row cannot both succeed. `version` is bumped by a
+    trigger on every change of the row's own fields (migrations/005); pass the
+    version a form was rendered from to refuse writes over a newer change.
+    Only a refused transition reads the row again, to say why.
+    """
+
+    @staticmethod
+    def _conditional(query, table, action, row_ids, department_id=None, version=None):
+        from_statuses, _ = TRANSITIONS[(table, action)]
+        query = query.in_("id", list(row_ids)).in_("status", list(from_statuses))
+        if department_id is not None:
+            query = query.eq("department_id", department_id)
+        if version is not None:
+            query = query.eq("version", version)
+        return query
+
+    @staticmethod
+    def apply(table, action, row_id, changes=None, department_id=None, version=None):
+        """
+        Perform one transition of one row
+        Returns (updated row, None), or (None, message) when it was not allowed
+        """
+        rows = Transitions.apply_many(table, action, [row_id], changes, department_id, version)
+        if rows:
+            return rows[0], None
+        return None, Transitions.refusal(table, action, row_id, department_id, version)
+
+    @staticmethod
+    def apply_many(table, action, row_ids, changes=None, department_id=None, version=None):
+        """Perform a transition on every row that allows it; returns the updated rows"""
+        if not row_ids:
+            return []
+        _, to_status = TRANSITIONS[(table, action)]
+        values = dict(changes or {})
+        if to_status:
+            values["status"] = to_status
+        result = Transitions._conditional(
+            supabase.table(table).update(values), table, action, row_ids, department_id, version
+        ).execute()
+        if result.data:
+            DataVersion.bump(table)
+        return result.data or []
+
+    @staticmethod
+    def delete(table, row_id, department_id=None, version=None):
+        """Delete a row in a status that allows it; returns (deleted row, None) or (None, message)"""
+        result = Transitions._conditional(
+            supabase.table(table).delete(), table, "delete", [row_id], department_id, version
+        ).execute()
+        if result.data:
+            DataVersion.bump(table)
+            return result.data[0], None
+        return None, Transitions.refusal(table, "delete", row_id, department_id, version)
+
+    @staticmethod
+    def refusal(table, action, row_id, department_id=None, version=None):
+        """Why a transition matched no row, from the row as it is now"""
+        noun = NOUNS[table]
+        current = supabase.table(table).select("status, department_id, version").eq("id", row_id).execute()
+        if not current.data:
+            return f"{noun.capitalize()} not found."
+        row = current.data[0]
+        if department_id is not None and row["department_id"] != department_id:
+            return f"You can only manage {noun}s from your own department."
+        from_statuses, to_status = TRANSITIONS[(table, action)]
+        if row["status"] not in from_statuses:
+            if row["status"] == to_status:
+                return f"{noun.capitalize()} is already {row['status'].lower()}."
+            return f"Cannot {action} this {noun}: it is {row['status'].lower()}."
+        if version is not None and row["version"] != version:
+            return f"This {noun} was changed by someone else. Please reload and try again."
+        # Allowed now: it changed back between the write and this read
+        return f"This {noun} was changed by someone else. Please try again."
@@ -1,6 +1,21 @@
 from config import supabase
+import os
+import threading
+import time
+
+# Columns that make up a user principal. The password column is deliberately
+# left out so the principal can be kept in the session cookie.
+PRINCIPAL_FIELDS = ("id", "email", "full_name", "student_id", "role", "department_name")
+
+# How long (seconds) a cached principal is trusted before re-reading the users row.
+# Accounts are only edited in the database (e.g. a role change in the Supabase
+# dashboard), so this is how long such a change takes to reach every worker.
+PRINCIPAL_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
 
 class User:
+    _principal_cache = {}      # email -> (principal, expires_at)
+    _cache_lock = threading.Lock()
+
     @staticmethod
     def create_user(full_name, student_id, email, password, role="student"):
         return supabase.table("users").insert({
@@ -14,3 +29,39 @@ class User:
     @staticmethod
     def get_user_by_email(email):
         return supabase.table("users").select("*").eq("email", email).execute()
+
+    @staticmethod
+    def to_principal(user_row):
+        """Reduce a users row to the fields needed for auth and display"""
+        return {field: user_row.get(field) for field in PRINCIPAL_FIELDS}
+
+    @staticmethod
+    def cache_principal(principal):
+        """Store a principal in the process cache"""
+        with User._cache_lock:
+            User._principal_cache[principal["email"]] = (principal, time.time() + PRINCIPAL_TTL)
+
+    @staticmethod
+    def get_principal(email):
+        """
+        Get the principal for an email, reading the users table only on a cache miss
+        Returns None if the user does not exist
+        """
+        now = time.time()
+        with User._cache_lock:
+            cached = User._principal_cache.get(email)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        user_response = User.get_user_by_email(email)
+        if not user_response.data:
+            return None
+
+        principal = User.to_principal(user_response.data[0])
+        User.cache_principal(principal)
+        return principal
+
+    @staticmethod
+    def is_principal_fresh(loaded_at):
+        """Check whether a principal loaded at `loaded_at` can still be trusted"""
+        return time.time() - loaded_at <= PRINCIPAL_TTL
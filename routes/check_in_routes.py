@@ -0,0 +1,9 @@
+from flask import Blueprint
+from controllers import check_in_controller
+
+check_in_bp = Blueprint("check_in", __name__)
+
+check_in_bp.route("/events/<event_id>/check-in", methods=["POST"])(check_in_controller.check_in)
+check_in_bp.route("/events/<event_id>/check-in/warm", methods=["POST"])(check_in_controller.warm_check_in)
+check_in_bp.route("/events/<event_id>/check-in/manifest", methods=["GET"])(check_in_controller.check_in_manifest)
+check_in_bp.route("/events/<event_id>/check-in/scans", methods=["POST"])(check_in_controller.upload_scans)
\ No newline at end of file
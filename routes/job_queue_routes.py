@@ -0,0 +1,6 @@
+from flask import Blueprint
+from controllers import job_queue_controller
+
+job_queue_bp = Blueprint("job_queue", __name__)
+
+job_queue_bp.route("/osas/jobs", methods=["GET"])(job_queue_controller.view_job_queue)
\ No newline at end of file
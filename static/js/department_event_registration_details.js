@@ -20,8 +20,33 @@ document.addEventListener('DOMContentLoaded', function() {
   // Animate registration cards on scroll
   animateCardsOnScroll();
   
+  // Wire up bulk approve/reject selection
+  setupBulkSelection();
+  
 });
 
+/**
+ * Toggle every pending registration checkbox from "Select all pending"
+ */
+function setupBulkSelection() {
+  const selectAll = document.getElementById('select-all-pending');
+  if (!selectAll) return;
+  
+  const checkboxes = document.querySelectorAll('.bulk-checkbox');
+  
+  selectAll.addEventListener('change', function() {
+    checkboxes.forEach(checkbox => {
+      checkbox.checked = selectAll.checked;
+    });
+  });
+  
+  checkboxes.forEach(checkbox => {
+    checkbox.addEventListener('change', function() {
+      selectAll.checked = Array.from(checkboxes).every(cb => cb.checked);
+    });
+  });
+}
+
 /**
  * Auto-hide alert messages after 5 seconds
  */
@@ -124,8 +149,8 @@ function enhanceCardInteractions() {
  * Enhance confirmation dialogs
  */
 function enhanceConfirmations() {
-  const approveButtons = document.querySelectorAll('.btn-approve');
-  const rejectButtons = document.querySelectorAll('.btn-reject');
+  const approveButtons = document.querySelectorAll('.registration-card .btn-approve');
+  const rejectButtons = document.querySelectorAll('.registration-card .btn-reject');
   
   approveButtons.forEach(button => {
     button.addEventListener('click', function(e) {
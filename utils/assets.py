@@ -0,0 +1,332 @@
+"""
+Static asset pipeline
+
+    python -m utils.assets
+
+1. Renders size-appropriate derivatives of the source logo into
+   static/images/logo/ (WebP + PNG at 1x/2x, favicon.ico, apple-touch-icon)
+2. Copies every file under static/ to static/dist/ with a content hash in its
+   name (css/dashboard.css -> css/dashboard.3f2a9c1d07.css)
+3. Concatenates and minifies the BUNDLES into static/dist/bundles/, also hashed
+4. Writes .gz (and .br, when the brotli package is installed) siblings of every
+   text asset, and static/dist/manifest.json mapping original -> hashed names
+
+Templates call static_url('images/logo/favicon.ico') or bundle_tags('department.css').
+With a manifest these resolve to the hashed copies under /assets/, served
+precompressed per Accept-Encoding with a far-future immutable Cache-Control;
+without one (no build yet) or in debug mode they fall back to the plain
+/static/ source files, so development works without running the build.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+
+from flask import current_app, g, request, send_from_directory, url_for
+from markupsafe import Markup, escape
+
+from utils.minify import minify_css, minify_js
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped; gzip is always built
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# Hash of the sources the last build was made from (see assets_stale())
+SOURCE_HASH_PATH = os.path.join(DIST_DIR, "source.sha256")
+
+# Full-resolution master logo; never referenced by pages directly
+LOGO_SOURCE = os.path.join(STATIC_DIR, "images", "lspu-logo.png")
+LOGO_DIR = os.path.join(STATIC_DIR, "images", "logo")
+
+# CSS pixel sizes the logo is displayed at (sidebar 40px, auth page up to 120px);
+# each is rendered at 1x and 2x
+LOGO_SIZES = (40, 120)
+FAVICON_SIZES = (16, 32, 48)
+APPLE_TOUCH_SIZE = 180
+
+# Hex digits of the SHA-256 content hash put in hashed file names
+HASH_LENGTH = 10
+
+# Bundle name -> source files under static/, concatenated in order. Each page
+# loads its layout's bundle (cached across pages) plus a small one of its own
+# rules, after it so they still override the layout's.
+# Scripts are not merged across files: page scripts and dashboard.js declare
+# functions with the same global names and rely on their load order.
+BUNDLES = {
+    "auth.css": ["css/auth.css"],
+    "auth.js": ["js/auth.js"],
+    "osas.css": ["css/dashboard.css"],
+    "department.css": ["css/dashboard.css"],
+    "dashboard.js": ["js/dashboard.js"],
+    "department-edit-request.css": ["css/edit-request.css"],
+    "department-edit-request.js": ["js/edit-request.js"],
+    "department-event-management.css": ["css/department_event_management.css"],
+    "department-event-management.js": ["js/department_event_management.js"],
+    "department-event-registration-details.css": ["css/department_event_registration_details.css"],
+    "department-event-registration-details.js": ["js/department_event_registration_details.js"],
+    "department-event-registrations.css": ["css/event-registrations.css"],
+    "department-event-registrations.js": ["js/event-registrations.js"],
+    "department-postpone-event.css": ["css/postpone_event.css"],
+    "department-postpone-event.js": ["js/postpone_event.js"],
+    "department-request-event.css": ["css/request-event.css"],
+    "department-request-event.js": ["js/request-event.js"],
+    "department-request-status.css": ["css/request-status.css"],
+    "department-request-status.js": ["js/request-status.js"],
+}
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+# Extensions that get precompressed siblings (images are already compressed)
+COMPRESSIBLE = (".css", ".js", ".svg", ".ico", ".json")
+
+# Served encoding -> sibling file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Hashed assets never change under the same URL, so browsers may keep them for a year
+ASSET_MAX_AGE = 31536000
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def build_logo_derivatives(source=LOGO_SOURCE, out_dir=LOGO_DIR):
+    """Render the resized logo files; returns their paths relative to static/"""
+    from PIL import Image
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+
+    def save(image, name, **options):
+        path = os.path.join(out_dir, name)
+        image.save(path, **options)
+        written.append(os.path.relpath(path, STATIC_DIR).replace(os.sep, "/"))
+
+    with Image.open(source) as original:
+        logo = original.convert("RGBA")
+
+    for size in LOGO_SIZES:
+        for scale in (1, 2):
+            pixels = size * scale
+            resized = logo.resize((pixels, pixels), Image.LANCZOS)
+            save(resized, f"lspu-logo-{pixels}.webp", format="WEBP", quality=85, method=6)
+            save(resized, f"lspu-logo-{pixels}.png", format="PNG", optimize=True)
+
+    largest = max(FAVICON_SIZES)
+    save(logo.resize((largest, largest), Image.LANCZOS), "favicon.ico", format="ICO",
+         sizes=[(s, s) for s in FAVICON_SIZES])
+    save(logo.resize((APPLE_TOUCH_SIZE, APPLE_TOUCH_SIZE), Image.LANCZOS), "apple-touch-icon.png",
+         format="PNG", optimize=True)
+    return written
+
+
+def hashed_name(path, data):
+    """css/dashboard.css + bytes -> css/dashboard.<hash>.css"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def write_hashed(relative, data, dist_dir=DIST_DIR):
+    """Write data under its hashed name plus compressed siblings; returns the hashed name"""
+    target = hashed_name(relative, data)
+    path = os.path.join(dist_dir, target)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    if target.endswith(COMPRESSIBLE):
+        compressed = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed[".br"] = brotli.compress(data, quality=11)
+        for suffix, body in compressed.items():
+            # Only worth serving when it is actually smaller
+            if len(body) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(body)
+    return target
+
+
+def build_fingerprints(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Copy every static file to dist/ under its hashed name; returns the manifest"""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        dirs.sort()
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                manifest[relative] = write_hashed(relative, f.read(), dist_dir)
+    return manifest
+
+
+def build_bundles(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Concatenate and minify each bundle; returns {"bundles/<name>": hashed name}"""
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        minify = MINIFIERS[os.path.splitext(name)[1]]
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_dir, source), encoding="utf-8") as f:
+                parts.append(minify(f.read()))
+        relative = f"bundles/{name}"
+        manifest[relative] = write_hashed(relative, "\n".join(parts).encode("utf-8"), dist_dir)
+    return manifest
+
+
+def source_hash(static_dir=STATIC_DIR):
+    """
+    SHA-256 over every source file under static/ and the pipeline itself
+    (bundle definitions, minifiers), so any change to them changes it
+    """
+    digest = hashlib.sha256(json.dumps(BUNDLES, sort_keys=True).encode("utf-8"))
+    pipeline = [os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), "minify.py")]
+    sources = []
+    for root, dirs, files in os.walk(static_dir):
+        # Build outputs, including the logo derivatives rendered from LOGO_SOURCE
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) not in (DIST_DIR, LOGO_DIR))
+        sources += [os.path.join(root, name) for name in sorted(files)]
+    for path in pipeline + sources:
+        digest.update(os.path.relpath(path, static_dir).replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def assets_stale():
+    """Whether the build is missing or was made from different sources than the current ones"""
+    try:
+        with open(SOURCE_HASH_PATH) as f:
+            recorded = f.read().strip()
+    except OSError:
+        return True
+    return not os.path.exists(MANIFEST_PATH) or recorded != source_hash()
+
+
+def build_assets():
+    """Run the whole pipeline; returns the manifest"""
+    build_logo_derivatives()
+    manifest = build_fingerprints()
+    manifest.update(build_bundles())
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    with open(SOURCE_HASH_PATH, "w") as f:
+        f.write(source_hash())
+    reload_manifest()
+    return manifest
+
+
+def load_manifest():
+    """Original -> hashed name mapping, read once per process ({} if not built)"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                try:
+                    with open(MANIFEST_PATH) as f:
+                        _manifest = json.load(f)
+                except (OSError, ValueError):
+                    _manifest = {}
+    return _manifest
+
+
+def reload_manifest():
+    global _manifest
+    with _manifest_lock:
+        _manifest = None
+    return load_manifest()
+
+
+def _preload(url, filename):
+    # Collected per request and sent as Link headers by _add_preload_headers
+    kind = "style" if filename.endswith(".css") else "script"
+    g.setdefault("preload_links", []).append(f"<{url}>; rel=preload; as={kind}")
+
+
+def static_url(filename, preload=False):
+    """URL of a file under static/, pointing at its hashed copy when one was built"""
+    hashed = None if current_app.debug else load_manifest().get(filename)
+    if hashed is None:
+        # Edits show up immediately during development
+        url = url_for("static", filename=filename)
+    else:
+        url = url_for("assets", filename=hashed)
+    if preload:
+        _preload(url, filename)
+    return url
+
+
+def bundle_urls(name, preload=False):
+    """URLs to include for a bundle: the built bundle, or its source files before a build"""
+    hashed = None if current_app.debug else load_manifest().get(f"bundles/{name}")
+    if hashed is None:
+        return [static_url(source, preload) for source in BUNDLES[name]]
+    url = url_for("assets", filename=hashed)
+    if preload:
+        _preload(url, name)
+    return [url]
+
+
+def bundle_tags(name, preload=False):
+    """<link>/<script> tags for a bundle, for use directly in templates"""
+    if name.endswith(".css"):
+        template = '<link rel="stylesheet" href="{}">'
+    else:
+        template = '<script src="{}"></script>'
+    return Markup("\n".join(template.format(escape(url)) for url in bundle_urls(name, preload)))
+
+
+def serve_asset(filename):
+    """
+    Serve a hashed file from static/dist with a far-future immutable Cache-Control,
+    using its precompressed sibling when the client accepts that encoding
+    """
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] > 0 and os.path.isfile(os.path.join(DIST_DIR, filename + suffix)):
+            response = send_from_directory(
+                DIST_DIR, filename + suffix, max_age=ASSET_MAX_AGE,
+                mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            )
+            response.headers["Content-Encoding"] = encoding
+            break
+    if response is None:
+        response = send_from_directory(DIST_DIR, filename, max_age=ASSET_MAX_AGE)
+    if filename.endswith(COMPRESSIBLE):
+        response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _add_preload_headers(response):
+    links = g.get("preload_links")
+    if links and response.mimetype == "text/html":
+        for link in links:
+            response.headers.add("Link", link)
+    return response
+
+
+def init_assets(app):
+    """Register the /assets route, preload headers and the asset template helpers"""
+    app.add_url_rule("/assets/<path:filename>", "assets", serve_asset)
+    app.after_request(_add_preload_headers)
+    app.add_template_global(static_url)
+    app.add_template_global(bundle_urls)
+    app.add_template_global(bundle_tags)
+
+
+if __name__ == "__main__":
+    built = build_assets()
+    print(f"Built {len(built)} assets into {os.path.relpath(DIST_DIR)}")
@@ -0,0 +1,65 @@
+from flask import redirect, url_for, flash, session, g
+from functools import wraps
+from models.user import User
+import time
+
+
+def remember_user(user_row):
+    """Store the logged-in user's principal in the session and the process cache"""
+    principal = User.to_principal(user_row)
+    User.cache_principal(principal)
+    session["user"] = principal
+    session["user_loaded_at"] = time.time()
+    return principal
+
+
+def get_current_user():
+    """
+    Resolve the logged-in user once per request
+    Order: g -> session principal (if still fresh) -> process cache -> users table
+    Returns None if nobody is logged in or the user no longer exists
+    """
+    if "current_user" in g:
+        return g.current_user
+
+    email = session.get("user_email")
+    if not email:
+        return None
+
+    principal = session.get("user")
+    loaded_at = session.get("user_loaded_at", 0)
+
+    if not principal or not User.is_principal_fresh(loaded_at):
+        principal = User.get_principal(email)
+        if principal:
+            session["user"] = principal
+            session["user_loaded_at"] = time.time()
+
+    g.current_user = principal
+    return principal
+
+
+def login_required(role=None, denied_message="Access denied."):
+    """
+    Require a logged-in user (optionally with a specific role)
+    The resolved user is available to the view as g.current_user
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if "user_email" not in session:
+                flash("Please login first.", "warning")
+                return redirect(url_for("user.login"))
+
+            user = get_current_user()
+            if not user:
+                flash("User not found.", "danger")
+                return redirect(url_for("user.login"))
+
+            if role and user["role"] != role:
+                flash(denied_message, "danger")
+                return redirect(url_for("home"))
+
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
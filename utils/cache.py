@@ -0,0 +1,56 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and,
+    optionally, by the total size of the cached values (len() of each value)
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._size -= self._sizeof(self._data.pop(key))
+            self._data[key] = value
+            self._size += self._sizeof(value)
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._size > self.max_bytes)
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self._size -= self._sizeof(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._size -= self._sizeof(self._data.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _sizeof(self, value):
+        return len(value) if self.max_bytes is not None else 0
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import contextvars
+import os
+import threading
+import time
+
+# Threads shared by all requests of a worker for concurrent data-store calls
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "8"))
+
+# Seconds a page waits for all of its fetches before giving up on the slow ones
+FANOUT_TIMEOUT = float(os.getenv("FANOUT_TIMEOUT", "10"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+_RAISE = object()
+
+
+class CallResult:
+    """Outcome of one call: its value, or the exception it raised/timed out with"""
+
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+
+    def get(self, default=_RAISE):
+        """Return the value; on failure re-raise, or return `default` if given"""
+        if self.error is not None:
+            if default is _RAISE:
+                raise self.error
+            return default
+        return self.value
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def fetch_concurrently(calls, timeout=FANOUT_TIMEOUT):
+    """
+    Run independent zero-argument callables at the same time
+    `calls` maps a name to a callable; returns {name: CallResult}
+    One call failing or timing out does not affect the others. Calls run with
+    a copy of the caller's context, so Flask's request, session and g work.
+    Do not call this from inside a call it runs (the pool would wait on itself).
+    """
+    executor = _get_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, call)
+        for name, call in calls.items()
+    }
+
+    deadline = time.monotonic() + timeout
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = CallResult(value=future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            results[name] = CallResult(error=TimeoutError(f"{name} did not finish within {timeout:g}s"))
+        except Exception as e:
+            results[name] = CallResult(error=e)
+    return results
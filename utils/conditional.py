@@ -0,0 +1,136 @@
+from datetime import datetime, timezone
+from functools import wraps
+import hashlib
+import os
+import threading
+import time
+
+from flask import g, request, session, make_response, message_flashed
+
+from utils.fragment_cache import DataVersion, FRAGMENT_CACHE_TTL
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+_build_id = None
+_build_id_lock = threading.Lock()
+
+
+def _get_build_id():
+    """Hash of the templates and asset manifest, so a deploy changes every validator"""
+    global _build_id
+    if _build_id is None:
+        with _build_id_lock:
+            if _build_id is None:
+                from utils.assets import MANIFEST_PATH
+
+                digest = hashlib.sha256()
+                paths = [os.path.join(root, name) for root, _, files in os.walk(TEMPLATES_DIR) for name in files]
+                for path in sorted(paths) + [MANIFEST_PATH]:
+                    try:
+                        with open(path, "rb") as f:
+                            digest.update(path.encode() + f.read())
+                    except OSError:
+                        continue
+                _build_id = digest.hexdigest()
+    return _build_id
+
+
+def _note_flash(app, message, category):
+    g.flashed_this_request = True
+
+
+# A page that flashed a message (e.g. an error while loading) is not reusable
+message_flashed.connect(_note_flash)
+
+
+def row_time(value):
+    """A row's timestamp column as an aware datetime (for a `rows` validator)"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def page_validators(scopes, rows=None):
+    """
+    (etag, last_modified) for the current request's page, from the data
+    versions of `scopes`, the user, the URL and the deployed templates
+    The versions only see writes made through the models and are per host, so
+    the validator also changes every FRAGMENT_CACHE_TTL seconds (the same bound
+    as the cached fragments). `rows()`, if given, returns (marker, modified
+    datetime or None) from one cheap query of the page's rows, for data that is
+    also written outside this app; the view can key its fragments on the marker
+    (g.page_rows).
+    """
+    user = g.get("current_user") or {}
+    bucket = int(time.time() // FRAGMENT_CACHE_TTL)
+    parts = [
+        _get_build_id(),
+        request.endpoint or "",
+        request.query_string.decode("latin-1"),
+        str(user.get("id", "")),
+        user.get("role", "") or "",
+        str(bucket),
+    ]
+    parts.extend(f"{scope}={DataVersion.current(scope)}" for scope in scopes)
+    row_modified = None
+    if rows is not None:
+        marker, row_modified = rows()
+        g.page_rows = marker
+        parts.append(f"rows={marker}")
+    etag = hashlib.sha256("\n".join(parts).encode()).hexdigest()[:32]
+
+    modified = [DataVersion.modified_at(scope) for scope in scopes]
+    last_modified = None
+    if modified and None not in modified:
+        modified.append(bucket * FRAGMENT_CACHE_TTL)
+        if row_modified:
+            modified.append(row_modified.timestamp())
+        last_modified = datetime.fromtimestamp(int(max(modified)), tz=timezone.utc)
+    return etag, last_modified
+
+
+def conditional_get(*scopes, rows=None):
+    """
+    Decorator for GET pages rendered from the data `scopes`
+    Answers If-None-Match / If-Modified-Since with 304 before the view runs (so
+    without rendering, and at most the one `rows` query; see page_validators),
+    and adds ETag / Last-Modified to 200 responses.
+    Apply below @login_required so the validator includes the signed-in user.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages are part of the page, so always render them
+            if request.method != "GET" or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            try:
+                etag, last_modified = page_validators(scopes, rows)
+            except Exception as e:
+                print(f"Error computing page validators: {e}")
+                return view(*args, **kwargs)
+
+            not_modified = False
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since and last_modified:
+                # Last-Modified has one-second resolution: a bump within the current
+                # second could be hidden behind an equal timestamp
+                settled = time.time() - last_modified.timestamp() >= 2
+                not_modified = settled and last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or g.get("flashed_this_request"):
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Browsers may keep the page but must revalidate it on every use
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+from markupsafe import Markup
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from utils.cache import LRUCache
+
+# Data the cached fragments are rendered from; models bump a scope on every write to it
+DATA_SCOPES = ("events", "event_requests", "registrations", "attendance", "revocations")
+
+# One small file per scope holding its current version token. Every worker on the
+# host reads the same files, so a write handled by one worker invalidates the
+# fragments cached by all of them.
+DATA_VERSION_DIR = os.getenv("DATA_VERSION_DIR", os.path.join(tempfile.gettempdir(), "cems-data-version"))
+
+# Upper bound on a fragment's age, for writes that bypass the models
+# (e.g. edits made directly in the Supabase dashboard)
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "300"))
+
+# Memory budget for rendered fragments per worker
+FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("FRAGMENT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+class _Fragment(str):
+    """Rendered HTML plus the time it was stored"""
+    stored_at = 0.0
+
+
+class DataVersion:
+    # Used when DATA_VERSION_DIR is not writable; then only this worker sees its bumps
+    _local = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _path(scope):
+        return os.path.join(DATA_VERSION_DIR, scope)
+
+    @staticmethod
+    def current(scope):
+        """Version token of a data scope"""
+        try:
+            with open(DataVersion._path(scope)) as f:
+                return f.read()
+        except OSError:
+            return DataVersion._local.get(scope, "0")
+
+    @staticmethod
+    def modified_at(scope):
+        """Time of the scope's last bump (epoch seconds), or None if unknown"""
+        try:
+            return os.stat(DataVersion._path(scope)).st_mtime
+        except OSError:
+            return None
+
+    @staticmethod
+    def bump(*scopes):
+        """Mark data in the given scopes as changed"""
+        for scope in scopes:
+            token = uuid.uuid4().hex
+            with DataVersion._lock:
+                DataVersion._local[scope] = token
+            try:
+                os.makedirs(DATA_VERSION_DIR, exist_ok=True)
+                temp_path = f"{DataVersion._path(scope)}.{os.getpid()}.{threading.get_ident()}"
+                with open(temp_path, "w") as f:
+                    f.write(token)
+                # Atomic: readers see the old token or the new one, never a partial write
+                os.replace(temp_path, DataVersion._path(scope))
+            except OSError as e:
+                print(f"Error bumping data version for {scope}: {e}")
+
+
+_fragments = LRUCache(max_entries=4096, max_bytes=FRAGMENT_CACHE_MAX_BYTES)
+
+
+def cached_fragment(name, key, scopes, render):
+    """
+    HTML fragment `name` for `key` (e.g. (department_id, status, cursor)),
+    rendered at the current version of the data `scopes` it depends on
+    `render()` returns (html, cacheable) and is only called on a miss, so a hit
+    touches neither the database nor Jinja
+    """
+    # Read versions before rendering: a write landing mid-render changes the
+    # version, so the entry stored below is never served for the new data
+    versions = tuple(DataVersion.current(scope) for scope in scopes)
+    cache_key = (name, key, versions)
+
+    fragment = _fragments.get(cache_key)
+    if fragment is not None and time.time() - fragment.stored_at < FRAGMENT_CACHE_TTL:
+        return Markup(fragment)
+
+    html, cacheable = render()
+    if cacheable:
+        fragment = _Fragment(html)
+        fragment.stored_at = time.time()
+        _fragments.set(cache_key, fragment)
+    return Markup(html)
+
+
+def clear_fragments():
+    _fragments.clear()
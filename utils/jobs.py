@@ -0,0 +1,333 @@
+"""
+Background jobs
+
+    python -m utils.jobs            # run JOB_WORKERS worker processes
+
+Slow follow-up work of a request (e.g. re-minting every QR token of a
+postponed event) is enqueued here and the request returns right away. Jobs
+live in a local SQLite file (JOB_QUEUE_PATH), so they survive restarts and
+every process on the host shares one queue. The queue is per host: with
+several app hosts, each host's workers run the jobs its own requests queued
+(keep JOB_QUEUE_PATH on local disk; SQLite locking is unreliable on network
+file systems).
+
+- enqueue(kind, payload, key=...) is idempotent: a second enqueue with the same
+  key returns the existing job instead of adding one
+- workers claim the oldest ready job with one atomic UPDATE, so each job runs
+  in one worker at a time
+- a failed job is retried with exponential backoff up to max_attempts; a job
+  whose worker died is retried once its lease (JOB_LEASE_SECONDS) runs out
+- handlers are plain functions registered with @job_handler("kind") in the
+  JOB_HANDLER_MODULES, called with the payload as keyword arguments
+
+Handlers may run more than once (a worker can die after the work but before
+recording it), so they must be safe to repeat.
+
+Gunicorn starts the worker pool next to the web workers (gunicorn.conf.py).
+With JOB_WORKERS=0 jobs run inline at enqueue time instead, for development.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+
+# The queue file, on this host's local disk (one queue per host)
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "cems-jobs.sqlite3"))
+
+# Worker processes; 0 runs each job inline when it is enqueued
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Modules whose @job_handler functions workers can run
+JOB_HANDLER_MODULES = ("models.job_handlers",)
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+# Retry n waits about JOB_RETRY_BASE_SECONDS * 2^(n-1), capped, with jitter
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+
+# A job running longer than this is presumed abandoned by a dead worker
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+# Idle workers check for new jobs this often
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+# Finished jobs (and their idempotency keys) are kept this long
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at);
+"""
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+_handlers = {}
+_local = threading.local()
+
+
+def job_handler(kind):
+    """Register a function as the handler of a job kind"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _load_handlers():
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def _connect():
+    """This thread's connection to the queue (a new one after fork)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = sqlite3.connect(JOB_QUEUE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # WAL lets the admin page read while a worker writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def enqueue(kind, payload=None, key=None, delay=0, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+    Queue a job; returns its id (the existing job's id if `key` was used before),
+    or None if the queue could not be written
+    """
+    now = time.time()
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "INSERT INTO jobs (kind, payload, idempotency_key, max_attempts, run_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(idempotency_key) DO NOTHING RETURNING id",
+            (kind, json.dumps(payload or {}), key, max_attempts, now + delay, now)
+        ).fetchone()
+        if row is None:
+            return conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (key,)).fetchone()["id"]
+    except sqlite3.Error as e:
+        # The request's own work is done; losing a follow-up must not fail it
+        print(f"Error enqueuing {kind} job: {e}")
+        return None
+
+    if JOB_WORKERS == 0 and not delay:
+        run_next(job_id=row["id"])
+    return row["id"]
+
+
+def _claim(job_id=None):
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Jobs whose worker died mid-run count the attempt and go back in the queue
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? END, "
+            "run_at = ?, last_error = 'Lease expired (worker stopped?)' "
+            "WHERE status = 'running' AND started_at < ?",
+            (now, now, now - JOB_LEASE_SECONDS)
+        )
+        pick = "SELECT id FROM jobs WHERE status = 'queued' AND run_at <= ?"
+        params = [now]
+        if job_id is not None:
+            pick += " AND id = ?"
+            params.append(job_id)
+        job = conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ? "
+            f"WHERE id = ({pick} ORDER BY run_at, id LIMIT 1) "
+            "RETURNING id, kind, payload, attempts, max_attempts",
+            [now] + params
+        ).fetchone()
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return job
+
+
+def _retry_delay(attempts):
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _finish(job, error=None):
+    conn = _connect()
+    now = time.time()
+    if error is None:
+        conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?", (now, job["id"]))
+    elif job["attempts"] < job["max_attempts"]:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', run_at = ?, last_error = ? WHERE id = ?",
+            (now + _retry_delay(job["attempts"]), error, job["id"])
+        )
+    else:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ? WHERE id = ?",
+            (now, error, job["id"])
+        )
+
+
+def run_next(job_id=None):
+    """Claim and run one ready job (or the given one); returns False if there was none"""
+    job = _claim(job_id)
+    if job is None:
+        return False
+
+    _load_handlers()
+    handler = _handlers.get(job["kind"])
+    if handler is None:
+        _finish({**dict(job), "attempts": job["max_attempts"]}, f"No handler for job kind '{job['kind']}'")
+        return True
+    try:
+        handler(**json.loads(job["payload"]))
+    except Exception as e:
+        print(f"Error running job {job['id']} ({job['kind']}), attempt {job['attempts']}: {e}")
+        _finish(job, f"{type(e).__name__}: {e}")
+    else:
+        _finish(job)
+    return True
+
+
+def purge_finished(older_than=JOB_RETENTION_SECONDS):
+    """Delete finished jobs past retention; their idempotency keys become reusable"""
+    _connect().execute(
+        "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (time.time() - older_than,)
+    )
+
+
+def queue_stats(recent=500):
+    """Queue depth per status and kind, and wait/run latency of the most recent jobs"""
+    conn = _connect()
+    now = time.time()
+    depth = {status: 0 for status in JOB_STATUSES}
+    by_kind = {}
+    for row in conn.execute("SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status"):
+        depth[row["status"]] = depth.get(row["status"], 0) + row["n"]
+        by_kind.setdefault(row["kind"], {status: 0 for status in JOB_STATUSES})[row["status"]] = row["n"]
+
+    oldest = conn.execute("SELECT MIN(run_at) FROM jobs WHERE status = 'queued' AND run_at <= ?", (now,)).fetchone()[0]
+
+    finished = conn.execute(
+        "SELECT started_at - run_at AS wait, finished_at - started_at AS run FROM jobs "
+        "WHERE status = 'done' ORDER BY finished_at DESC LIMIT ?", (recent,)
+    ).fetchall()
+
+    def summary(values):
+        if not values:
+            return None
+        values = sorted(max(0.0, v) for v in values)
+        return {
+            "avg": sum(values) / len(values),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+        }
+
+    return {
+        "depth": depth,
+        "by_kind": by_kind,
+        "oldest_ready_age": now - oldest if oldest else None,
+        "wait": summary([row["wait"] for row in finished]),
+        "run": summary([row["run"] for row in finished]),
+        "sampled": len(finished),
+    }
+
+
+def recent_jobs(status=None, limit=20):
+    """Latest jobs, optionally of one status, newest first"""
+    query = "SELECT * FROM jobs"
+    params = []
+    if status:
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in _connect().execute(query, params)]
+
+
+def worker_loop(stop=None):
+    """Run jobs until `stop` is set (or forever)"""
+    _load_handlers()
+    idle_polls = 0
+    while stop is None or not stop.is_set():
+        try:
+            if run_next():
+                idle_polls = 0
+                continue
+            idle_polls += 1
+            # Roughly hourly when idle
+            if idle_polls % max(1, int(3600 / JOB_POLL_SECONDS)) == 1:
+                purge_finished()
+        except sqlite3.Error as e:
+            print(f"Error polling job queue: {e}")
+        time.sleep(JOB_POLL_SECONDS)
+
+
+def _worker_main(stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    # Fresh data client in this process (never one inherited across fork)
+    from config import reset_client
+    reset_client()
+    worker_loop(stop)
+
+
+def run_workers(count=None, stop=None):
+    """Run `count` worker processes, restarting any that die, until `stop` is set"""
+    count = JOB_WORKERS if count is None else count
+    stop = stop or multiprocessing.Event()
+
+    def start():
+        process = multiprocessing.Process(target=_worker_main, args=(stop,), name="cems-job-worker")
+        process.start()
+        return process
+
+    processes = [start() for _ in range(count)]
+    try:
+        while not stop.is_set():
+            stop.wait(5)
+            processes = [p if p.is_alive() or stop.is_set() else start() for p in processes]
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(JOB_LEASE_SECONDS)
+
+
+def start_worker_pool():
+    """Start run_workers() in a child process; returns (process, stop event)"""
+    stop = multiprocessing.Event()
+    pool = multiprocessing.Process(target=run_workers, kwargs={"stop": stop}, name="cems-job-pool")
+    pool.start()
+    return pool, stop
+
+
+if __name__ == "__main__":
+    stop_event = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        run_workers(stop=stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
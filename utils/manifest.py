@@ -0,0 +1,224 @@
+"""
+Offline check-in manifests
+
+A manifest is a small binary file a scanner downloads once per event and then
+verifies codes against without the network:
+
+    header      MANIFEST_HEADER (40 bytes, little-endian)
+    event id    u8 length + UTF-8 (integer or UUID ids alike)
+    bloom       optional Bloom filter over the record keys
+    records     record_count x RECORD (24 bytes), sorted by key
+    removed     delta only: registration ids no longer admitted
+    strings     registration id, student id and name of each record
+    crc32       of everything above
+
+Record keys are the 16 bytes of the unique_code UUID (codes that are not UUIDs
+use the first 16 bytes of their SHA-256), so a lookup is a binary search over
+fixed-size records: ~14 comparisons for 10k registrants, no parsing at load.
+Strings are length-prefixed (u8 length + UTF-8) and zlib-compressed when that
+is smaller; records point into them by offset.
+
+A full manifest lists every approved registration. A delta (FLAG_DELTA) lists
+registrations approved or changed after `base` (the generated_at of the
+manifest it applies to) plus ids to drop; applying one is an upsert by
+registration id.
+
+The Bloom filter's hash positions come straight from the key, which is already
+random: h1 = u32(key[0:4]), h2 = u32(key[12:16]) | 1, position i is
+(h1 + i * h2) mod bits.
+"""
+import hashlib
+import struct
+import uuid
+import zlib
+
+MAGIC = b"CEMF"
+FORMAT_VERSION = 2
+
+FLAG_DELTA = 0x01
+FLAG_BLOOM = 0x02
+FLAG_ZLIB_STRINGS = 0x04
+
+# Record flags
+RECORD_CHECKED_IN = 0x01
+
+# magic, format version, flags, bloom hashes, reserved, generated_at (epoch ms),
+# base (epoch ms, 0 for a full manifest), record count, removed count, bloom
+# bytes, strings bytes
+MANIFEST_HEADER = struct.Struct("<4sBBBxQQIIII")
+
+# key, offset of the record's strings, record flags
+RECORD = struct.Struct("<16sIB3x")
+
+CRC = struct.Struct("<I")
+
+# ~1% false positives at 10 bits and 7 hashes per entry
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 7
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def code_key(code):
+    """16-byte lookup key of a unique_code"""
+    try:
+        return uuid.UUID(code).bytes
+    except (ValueError, AttributeError, TypeError):
+        return hashlib.sha256(str(code).encode("utf-8")).digest()[:16]
+
+
+def _bloom_positions(key, bits, hashes):
+    h1 = int.from_bytes(key[0:4], "little")
+    h2 = int.from_bytes(key[12:16], "little") | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def _build_bloom(keys):
+    bits = max(64, len(keys) * BLOOM_BITS_PER_ENTRY)
+    bits += -bits % 8
+    bloom = bytearray(bits // 8)
+    for key in keys:
+        for position in _bloom_positions(key, bits, BLOOM_HASHES):
+            bloom[position >> 3] |= 1 << (position & 7)
+    return bytes(bloom)
+
+
+def _short_string(value):
+    # Length fits a u8; cut on a character boundary
+    data = str(value if value is not None else "").encode("utf-8")[:255]
+    data = data.decode("utf-8", "ignore").encode("utf-8")
+    return bytes((len(data),)) + data
+
+
+def encode_manifest(event_id, generated_at, records, removed=(), base=0, bloom=False):
+    """
+    Serialize a manifest
+    `records` are dicts with unique_code, registration_id, student_id,
+    student_name and checked_in; `removed` are registration ids (deltas only)
+    """
+    entries = []
+    strings = bytearray()
+    for record in records:
+        offset = len(strings)
+        for field in ("registration_id", "student_id", "student_name"):
+            strings += _short_string(record.get(field))
+        flags = RECORD_CHECKED_IN if record.get("checked_in") else 0
+        entries.append((code_key(record["unique_code"]), offset, flags))
+    entries.sort()
+
+    removed_section = b"".join(_short_string(registration_id) for registration_id in removed)
+
+    flags = FLAG_DELTA if base else 0
+    strings = bytes(strings)
+    compressed = zlib.compress(strings, 9)
+    if len(compressed) < len(strings):
+        strings = compressed
+        flags |= FLAG_ZLIB_STRINGS
+
+    bloom_section = b""
+    if bloom:
+        bloom_section = _build_bloom([key for key, _, _ in entries])
+        flags |= FLAG_BLOOM
+
+    body = b"".join([
+        MANIFEST_HEADER.pack(
+            MAGIC, FORMAT_VERSION, flags, BLOOM_HASHES if bloom else 0, generated_at, base,
+            len(entries), len(removed), len(bloom_section), len(strings)
+        ),
+        _short_string(event_id),
+        bloom_section,
+        b"".join(RECORD.pack(*entry) for entry in entries),
+        removed_section,
+        strings,
+    ])
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def _read_short_strings(data, offset, count):
+    values = []
+    for _ in range(count):
+        length = data[offset]
+        values.append(bytes(data[offset + 1:offset + 1 + length]).decode("utf-8"))
+        offset += 1 + length
+    return values, offset
+
+
+class Manifest:
+    """Decoded manifest; the reference for scanner implementations"""
+
+    def __init__(self, data):
+        data = memoryview(bytes(data))
+        if len(data) < MANIFEST_HEADER.size + CRC.size:
+            raise ManifestError("Manifest is truncated.")
+        if zlib.crc32(data[:-CRC.size]) != CRC.unpack_from(data, len(data) - CRC.size)[0]:
+            raise ManifestError("Manifest checksum does not match.")
+
+        (magic, version, self.flags, self.bloom_hashes, self.generated_at, self.base,
+         record_count, removed_count, bloom_size, strings_size) = MANIFEST_HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ManifestError(f"Not a version {FORMAT_VERSION} check-in manifest.")
+
+        (self.event_id,), offset = _read_short_strings(data, MANIFEST_HEADER.size, 1)
+        self.bloom = bytes(data[offset:offset + bloom_size])
+        offset += bloom_size
+        self.records = bytes(data[offset:offset + record_count * RECORD.size])
+        offset += len(self.records)
+        self.removed, offset = _read_short_strings(data, offset, removed_count)
+        strings = data[offset:offset + strings_size]
+        self.strings = zlib.decompress(strings) if self.flags & FLAG_ZLIB_STRINGS else bytes(strings)
+        self.count = record_count
+
+    @property
+    def is_delta(self):
+        return bool(self.flags & FLAG_DELTA)
+
+    def _key_at(self, position):
+        start = position * RECORD.size
+        return self.records[start:start + 16]
+
+    def _record(self, position):
+        _, offset, flags = RECORD.unpack_from(self.records, position * RECORD.size)
+        (registration_id, student_id, student_name), _ = _read_short_strings(self.strings, offset, 3)
+        return {
+            "registration_id": registration_id,
+            "student_id": student_id,
+            "student_name": student_name,
+            "checked_in": bool(flags & RECORD_CHECKED_IN),
+        }
+
+    def might_contain(self, code):
+        """Bloom prefilter: False means the code is certainly not in the manifest"""
+        if not self.flags & FLAG_BLOOM:
+            return True
+        key = code_key(code)
+        bits = len(self.bloom) * 8
+        return all(
+            self.bloom[position >> 3] & (1 << (position & 7))
+            for position in _bloom_positions(key, bits, self.bloom_hashes)
+        )
+
+    def lookup(self, code):
+        """The record for a scanned code, or None if it is not admitted"""
+        if not self.might_contain(code):
+            return None
+        key = code_key(code)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._key_at(low) == key:
+            return self._record(low)
+        return None
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self._record(position)
+
+    def __len__(self):
+        return self.count
+
@@ -0,0 +1,229 @@
+from flask import g, has_request_context, request, Response, abort
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("cems.datastore")
+
+# Data-store calls slower than this (milliseconds) are logged and counted as slow
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Bearer token required to read /metrics; without one only loopback clients may
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CALLS_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+WRITE_OPERATIONS = ("insert", "update", "upsert", "delete")
+FILTER_METHODS = ("eq", "neq", "gt", "gte", "lt", "lte", "in_", "is_", "or_", "like", "ilike", "match", "filter")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Process-local counters and histograms rendered in Prometheus text format
+    Under gunicorn each worker keeps its own registry and a scrape reaches one
+    of them, so every sample carries a worker="<pid>" label; aggregate with
+    sum without (worker) over the series of all workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = {}            # (endpoint, table, operation) -> count
+            self.rows = {}             # (table, operation) -> rows returned
+            self.slow_calls = {}       # (endpoint, table, operation) -> count
+            self.errors = {}           # (table, operation) -> count
+            self.latency = {}          # (table, operation) -> Histogram
+            self.requests = {}         # endpoint -> count
+            self.request_calls = {}    # endpoint -> Histogram of data-store calls per request
+            self.request_latency = {}  # endpoint -> Histogram of request duration
+
+    def record_call(self, endpoint, table, operation, seconds, rows, error=False):
+        with self.lock:
+            key = (endpoint, table, operation)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.rows[(table, operation)] = self.rows.get((table, operation), 0) + rows
+            if error:
+                self.errors[(table, operation)] = self.errors.get((table, operation), 0) + 1
+            if seconds * 1000 >= SLOW_QUERY_MS:
+                self.slow_calls[key] = self.slow_calls.get(key, 0) + 1
+            self.latency.setdefault((table, operation), Histogram(LATENCY_BUCKETS)).observe(seconds)
+
+    def record_request(self, endpoint, seconds, calls):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.request_calls.setdefault(endpoint, Histogram(CALLS_PER_REQUEST_BUCKETS)).observe(calls)
+            self.request_latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+
+    def render(self):
+        lines = []
+
+        worker = os.getpid()
+
+        def labels(**values):
+            return "{" + ",".join(f'{k}="{v}"' for k, v in dict(worker=worker, **values).items()) + "}"
+
+        def counter(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for label_values, value in samples:
+                lines.append(f"{name}{labels(**label_values)} {value}")
+
+        def histogram(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for label_values, hist in samples:
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{name}_bucket{labels(**label_values, le=bound)} {count}")
+                lines.append(f"{name}_bucket{labels(**label_values, le='+Inf')} {hist.total}")
+                lines.append(f"{name}_sum{labels(**label_values)} {hist.sum}")
+                lines.append(f"{name}_count{labels(**label_values)} {hist.total}")
+
+        with self.lock:
+            counter("cems_datastore_calls_total", "Data-store calls by Flask endpoint, table and operation",
+                    [(dict(endpoint=e, table=t, operation=o), v) for (e, t, o), v in sorted(self.calls.items())])
+            counter("cems_datastore_slow_calls_total", f"Data-store calls slower than {SLOW_QUERY_MS:g} ms",
+                    [(dict(endpoint=e, table=t, operation=o), v) for (e, t, o), v in sorted(self.slow_calls.items())])
+            counter("cems_datastore_errors_total", "Data-store calls that raised",
+                    [(dict(table=t, operation=o), v) for (t, o), v in sorted(self.errors.items())])
+            counter("cems_datastore_rows_total", "Rows returned by data-store calls",
+                    [(dict(table=t, operation=o), v) for (t, o), v in sorted(self.rows.items())])
+            histogram("cems_datastore_call_seconds", "Data-store call latency",
+                      [(dict(table=t, operation=o), h) for (t, o), h in sorted(self.latency.items())])
+            counter("cems_http_requests_total", "HTTP requests by Flask endpoint",
+                    [(dict(endpoint=e), v) for e, v in sorted(self.requests.items())])
+            histogram("cems_http_request_datastore_calls", "Data-store calls made per HTTP request",
+                      [(dict(endpoint=e), h) for e, h in sorted(self.request_calls.items())])
+            histogram("cems_http_request_seconds", "HTTP request latency",
+                      [(dict(endpoint=e), h) for e, h in sorted(self.request_latency.items())])
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _current_endpoint():
+    if has_request_context():
+        return request.endpoint or "unknown"
+    return "background"
+
+
+class InstrumentedQuery:
+    """Wraps a query builder and records every execute()"""
+
+    def __init__(self, query, table, operation="select", filters=()):
+        self._query = query
+        self._table = table
+        self._operation = operation
+        self._filters = filters
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            operation = name if name in WRITE_OPERATIONS + ("select",) else self._operation
+            filters = self._filters
+            if name in FILTER_METHODS:
+                filters = filters + (f"{name.rstrip('_')}:{args[0] if args else ''}",)
+            return InstrumentedQuery(result, self._table, operation, filters)
+        return call
+
+    def execute(self):
+        endpoint = _current_endpoint()
+        started = time.perf_counter()
+        rows = 0
+        error = False
+        try:
+            response = self._query.execute()
+            data = getattr(response, "data", None)
+            rows = len(data) if isinstance(data, list) else int(bool(data))
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.record_call(endpoint, self._table, self._operation, elapsed, rows, error)
+            if has_request_context():
+                # Calls may run on fan-out threads sharing this request's g
+                with registry.lock:
+                    g.datastore_calls = g.get("datastore_calls", 0) + 1
+            if elapsed * 1000 >= SLOW_QUERY_MS:
+                logger.warning(
+                    "Slow data-store call: %.1f ms %s %s filters=%s rows=%d endpoint=%s",
+                    elapsed * 1000, self._operation, self._table, ",".join(self._filters), rows, endpoint
+                )
+
+
+class InstrumentedClient:
+    """Wraps a data client so every table query is recorded"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name):
+        return InstrumentedQuery(self._client.table(name), name)
+
+    def rpc(self, function, params=None):
+        return InstrumentedQuery(self._client.rpc(function, params or {}), function, "rpc")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _before_request():
+    g.datastore_calls = 0
+    g.request_started = time.perf_counter()
+
+
+def _after_request(response):
+    if "request_started" in g:
+        registry.record_request(
+            request.endpoint or "unknown",
+            time.perf_counter() - g.request_started,
+            g.get("datastore_calls", 0)
+        )
+    return response
+
+
+def metrics():
+    """Expose counters and histograms in the Prometheus text format (this worker's only)"""
+    if METRICS_TOKEN:
+        if request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            abort(401)
+    # A request relayed by a local reverse proxy arrives from loopback too
+    elif request.remote_addr not in LOOPBACK_ADDRESSES or "X-Forwarded-For" in request.headers:
+        abort(403)
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """Register per-request accounting and the /metrics endpoint on the app"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", metrics)
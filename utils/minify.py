@@ -0,0 +1,146 @@
+"""
+Conservative CSS/JS minifiers for the asset build (no external dependencies)
+
+Both only drop comments and redundant whitespace; string, template and regex
+literals are copied through untouched. JS keeps its line breaks so automatic
+semicolon insertion behaves exactly as in the source.
+"""
+import re
+
+# A "/" after one of these (or at the start) begins a regex literal, not a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORD = re.compile(r"(?:^|[^\w$])(?:return|typeof|instanceof|in|of|new|delete|void|throw|case|do|else)$")
+
+
+def _read_string(source, i):
+    """Index just past the quoted string starting at source[i]"""
+    quote = source[i]
+    i += 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == "\\" else 1
+    return i + 1
+
+
+def minify_css(source):
+    out = []
+    i = 0
+    code = []
+
+    def flush():
+        text = "".join(code)
+        text = re.sub(r"\s+", " ", text)
+        text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+        text = re.sub(r":\s+", ":", text)
+        text = text.replace(";}", "}")
+        out.append(text)
+        code.clear()
+
+    while i < len(source):
+        ch = source[i]
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = len(source) if end == -1 else end + 2
+            code.append(" ")
+        elif ch in "\"'":
+            flush()
+            end = _read_string(source, i)
+            out.append(source[i:end])
+            i = end
+        else:
+            code.append(ch)
+            i += 1
+    flush()
+    return "".join(out).strip()
+
+
+def minify_js(source):
+    out = []
+    code = []
+
+    def flush():
+        text = "".join(code)
+        text = re.sub(r"[ \t]*\n\s*", "\n", text)
+        text = re.sub(r"[ \t]+", " ", text)
+        out.append(text)
+        code.clear()
+
+    def last_significant():
+        text = "".join(code).rstrip()
+        if not text and out:
+            text = out[-1].rstrip()
+        return text
+
+    def read_template(i):
+        """Index just past the template literal starting at source[i]"""
+        i += 1
+        while i < len(source) and source[i] != "`":
+            if source[i] == "\\":
+                i += 2
+            elif source.startswith("${", i):
+                i = read_code(i + 2, "}")
+            else:
+                i += 1
+        return i + 1
+
+    def read_code(i, closing):
+        """Skip over code inside ${...} up to its matching brace"""
+        depth = 0
+        while i < len(source):
+            ch = source[i]
+            if ch in "\"'":
+                i = _read_string(source, i)
+            elif ch == "`":
+                i = read_template(i)
+            elif ch == "{":
+                depth += 1
+                i += 1
+            elif ch == closing and depth == 0:
+                return i + 1
+            elif ch == "}":
+                depth -= 1
+                i += 1
+            else:
+                i += 1
+        return i
+
+    i = 0
+    while i < len(source):
+        ch = source[i]
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            comment = source[i:len(source) if end == -1 else end + 2]
+            code.append("\n" if "\n" in comment else " ")
+            i += len(comment)
+        elif ch in "\"'`":
+            end = read_template(i) if ch == "`" else _read_string(source, i)
+            flush()
+            out.append(source[i:end])
+            i = end
+        elif ch == "/":
+            before = last_significant()
+            if not before or before[-1] in _REGEX_PRECEDERS or _REGEX_KEYWORD.search(before):
+                # Regex literal: copy through, including any [...] classes
+                j = i + 1
+                in_class = False
+                while j < len(source) and (in_class or source[j] != "/") and source[j] != "\n":
+                    if source[j] == "\\":
+                        j += 1
+                    elif source[j] == "[":
+                        in_class = True
+                    elif source[j] == "]":
+                        in_class = False
+                    j += 1
+                flush()
+                out.append(source[i:j + 1])
+                i = j + 1
+            else:
+                code.append(ch)
+                i += 1
+        else:
+            code.append(ch)
+            i += 1
+    flush()
+    return "".join(out).strip() + "\n"
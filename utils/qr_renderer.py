@@ -0,0 +1,127 @@
+from io import BytesIO
+from utils.cache import LRUCache
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import qrcode
+import qrcode.image.svg
+
+# Encoded images kept in memory, keyed by (code, format, box_size)
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Rendered PNGs shared by every process on the host, so each code is rasterized
+# once per host rather than once per worker; job workers pre-render the codes of
+# new approvals here (render_qr_codes)
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cems-qr"))
+
+# Cached PNGs older than this are deleted (checked at most hourly per process)
+QR_CACHE_MAX_AGE = int(os.getenv("QR_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+_last_prune = 0.0
+
+
+def render_qr_png(code, box_size=10, border=5):
+    """Rasterize one code to PNG bytes"""
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(code)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_qr_svg(code, box_size=10, border=5):
+    """Render one code as SVG bytes (vector output, cheap enough to run inline)"""
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border, image_factory=qrcode.image.svg.SvgPathImage)
+    qr.add_data(code)
+    qr.make(fit=True)
+
+    buffered = BytesIO()
+    qr.make_image().save(buffered)
+    return buffered.getvalue()
+
+
+_image_cache = LRUCache(max_entries=4096, max_bytes=QR_CACHE_MAX_BYTES)
+
+
+def qr_etag(code, fmt="png", box_size=10):
+    """Strong validator for a rendered QR; rendering is deterministic in its inputs"""
+    return hashlib.sha256(f"{code}:{fmt}:{box_size}".encode()).hexdigest()[:32]
+
+
+def _cache_path(code, box_size):
+    return os.path.join(QR_CACHE_DIR, f"{qr_etag(code, 'png', box_size)}.png")
+
+
+def _read_cached_png(code, box_size):
+    try:
+        with open(_cache_path(code, box_size), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store_png(code, box_size, image):
+    global _last_prune
+    try:
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        path = _cache_path(code, box_size)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temp_path, "wb") as f:
+            f.write(image)
+        # Atomic: readers see the whole image or none
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Error caching QR image: {e}")
+    if time.time() - _last_prune >= 3600:
+        _last_prune = time.time()
+        prune_qr_cache()
+
+
+def render_qr_codes(codes, box_size=10):
+    """Render codes into the shared cache ahead of their first view; returns how many were rendered"""
+    rendered = 0
+    for code in codes:
+        if code and _read_cached_png(code, box_size) is None:
+            _store_png(code, box_size, render_qr_png(code, box_size))
+            rendered += 1
+    return rendered
+
+
+def prune_qr_cache(max_age=QR_CACHE_MAX_AGE):
+    """Delete cached PNGs older than `max_age` seconds"""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(QR_CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+
+def get_qr_image(code, fmt="png", box_size=10):
+    """
+    Return the encoded QR image for a code: from this process's memory, then the
+    shared cache, and only rendered here (once per host) when neither has it
+    """
+    key = (code, fmt, box_size)
+    image = _image_cache.get(key)
+    if image is None:
+        if fmt == "svg":
+            image = render_qr_svg(code, box_size)
+        else:
+            image = _read_cached_png(code, box_size)
+            if image is None:
+                image = render_qr_png(code, box_size)
+                _store_png(code, box_size, image)
+        _image_cache.set(key, image)
+    return image
@@ -0,0 +1,142 @@
+"""
+Signed registration tokens
+
+With REGISTRATION_TOKEN_KEYS set, approved registrations get a token instead of
+a random uuid4 as their unique_code:
+
+    <key id>.<registration id>.<event id>.<issued at>.<expires at>.<signature>
+
+Times are base-36 epoch milliseconds/seconds; the signature is HMAC-SHA256 over
+everything before it under the named key, truncated to 128 bits and base64url
+encoded. Verification is CPU only: check the signature and expiry here, then the
+in-memory revocation list (models/token_revocations.py).
+
+Rotation: REGISTRATION_TOKEN_KEYS="2025b:<secret>,2025a:<old secret>". The first
+key signs new tokens; the others still verify, until every token they signed has
+expired and they are removed.
+"""
+from datetime import datetime, timezone
+import base64
+import hashlib
+import hmac
+import os
+import re
+import time
+
+# Comma-separated key id:secret pairs, newest first; unset keeps uuid4 codes
+REGISTRATION_TOKEN_KEYS = os.getenv("REGISTRATION_TOKEN_KEYS", "")
+
+# Hours after the event ends that its tokens stay valid (late scan-log uploads)
+REGISTRATION_TOKEN_GRACE_HOURS = int(os.getenv("REGISTRATION_TOKEN_GRACE_HOURS", "24"))
+
+# Signature bytes kept; 128 bits keeps the QR code small
+SIGNATURE_BYTES = 16
+
+KEY_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,16}$")
+ID_PATTERN = re.compile(r"^[A-Za-z0-9-]{1,40}$")
+
+
+class TokenError(ValueError):
+    """Rejected token; `reason` is "malformed", "unknown_key", "bad_signature" or "expired" """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _parse_keys(value):
+    keys = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        key_id, _, secret = pair.partition(":")
+        if not KEY_ID_PATTERN.match(key_id) or not secret:
+            raise ValueError(f"Invalid REGISTRATION_TOKEN_KEYS entry '{key_id}': expected <key id>:<secret>")
+        keys[key_id] = secret.encode("utf-8")
+    return keys
+
+
+# Dicts keep insertion order, so the first configured key is the signing key
+_keys = _parse_keys(REGISTRATION_TOKEN_KEYS)
+
+
+def tokens_enabled():
+    return bool(_keys)
+
+
+def _signature(key, message):
+    digest = hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
+
+
+def token_expiry(event):
+    """Expiry (epoch seconds) for tokens of an event row with date and end_time"""
+    end = datetime.fromisoformat(f"{event['date']}T{str(event['end_time'])[:8]}")
+    # Event times are stored without a zone; reading them as UTC errs late, within the grace period
+    return int(end.replace(tzinfo=end.tzinfo or timezone.utc).timestamp()) + REGISTRATION_TOKEN_GRACE_HOURS * 3600
+
+
+def mint_registration_token(registration_id, event_id, expires_at):
+    """Signed token for an approved registration, under the current signing key"""
+    key_id, key = next(iter(_keys.items()))
+    message = ".".join([
+        key_id, str(registration_id), str(event_id),
+        _base36(int(time.time() * 1000)), _base36(int(expires_at))
+    ])
+    return f"{message}.{_signature(key, message)}"
+
+
+def is_signed_token(code):
+    return code.count(".") == 5
+
+
+def token_expires_at(code):
+    """Expiry (epoch seconds) written in a signed token, unverified; None if unreadable"""
+    parts = str(code or "").split(".")
+    try:
+        return int(parts[4], 36) if len(parts) == 6 else None
+    except ValueError:
+        return None
+
+
+def verify_registration_token(token, now=None):
+    """
+    Claims of a valid token: registration_id, event_id, issued_at (epoch ms), expires_at
+    Raises TokenError otherwise; no I/O
+    """
+    parts = token.split(".")
+    if len(parts) != 6:
+        raise TokenError("malformed")
+    key_id, registration_id, event_id, issued_at, expires_at, signature = parts
+    if not ID_PATTERN.match(registration_id) or not ID_PATTERN.match(event_id):
+        raise TokenError("malformed")
+
+    key = _keys.get(key_id)
+    if key is None:
+        raise TokenError("unknown_key")
+    expected = _signature(key, token.rpartition(".")[0])
+    if not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+        raise TokenError("bad_signature")
+
+    try:
+        issued_at, expires_at = int(issued_at, 36), int(expires_at, 36)
+    except ValueError:
+        raise TokenError("malformed")
+    if (now if now is not None else time.time()) > expires_at:
+        raise TokenError("expired")
+
+    return {
+        "registration_id": registration_id,
+        "event_id": event_id,
+        "issued_at": issued_at,
+        "expires_at": expires_at,
+        "key_id": key_id,
+    }